@@ -0,0 +1,56 @@
+"""
+Atlas de texturas.
+Na inicialização todas as imagens de images/ são empacotadas numa superfície
+só, convertida com convert_alpha(). Cada quadro vira uma subsuperfície do
+atlas com o rect já calculado, então desenhar um sprite é um acesso a
+dicionário e um blit, sem passar pelo loader de imagens do pgzero.
+"""
+import os
+
+import pygame
+
+from entities import IMAGES_DIR
+
+ATLAS_WIDTH = 1024
+# Espaço entre os quadros, para um não vazar no vizinho
+PADDING = 1
+
+
+class Atlas:
+    def __init__(self, images_dir=IMAGES_DIR, width=ATLAS_WIDTH):
+        sources = {}
+        for name in sorted(os.listdir(images_dir)):
+            if name.endswith(".png"):
+                image = pygame.image.load(os.path.join(images_dir, name))
+                # Mesmo formato que o loader do pgzero entrega
+                sources[name[:-4]] = image.convert_alpha() if pygame.display.get_surface() else image
+
+        # Empacotamento em prateleiras, dos sprites mais altos para os mais baixos
+        self.rects = {}
+        x = y = shelf = 0
+        for name, image in sorted(sources.items(), key=lambda item: -item[1].get_height()):
+            w, h = image.get_size()
+            if x + w > width:
+                x = 0
+                y += shelf + PADDING
+                shelf = 0
+            self.rects[name] = pygame.Rect(x, y, w, h)
+            x += w + PADDING
+            shelf = max(shelf, h)
+
+        surface = pygame.Surface((width, y + shelf), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 0))
+        for name, image in sources.items():
+            # Somar sobre o fundo zerado copia RGBA exato; um blit com alpha misturaria
+            surface.blit(image, self.rects[name], special_flags=pygame.BLEND_RGBA_ADD)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        self.surface = surface
+        self.frames = {name: surface.subsurface(rect) for name, rect in self.rects.items()}
+
+    def frame(self, name):
+        return self.frames[name]
+
+    def animation(self, names):
+        """Os quadros de uma animação, na ordem, para indexar pelo relógio."""
+        return tuple(self.frames[name] for name in names)
@@ -0,0 +1,95 @@
+"""
+Efeitos sonoros em fila, tocados uma vez por frame.
+
+O World só emite nomes de eventos ("coin_sound", "jump"...); push() guarda o
+nome sem tocar no mixer, e flush(), no fim do update(), toca cada som uma
+vez só por frame, ignora repetições do mesmo som a menos de MIN_INTERVAL s
+e usa um conjunto fixo de canais reservados. Os sons são carregados e têm o
+volume ajustado uma vez, em preload().
+"""
+import time
+
+import pygame
+
+VOLUME = 0.2
+CHANNELS = 6
+# Intervalo mínimo entre duas execuções do mesmo som
+MIN_INTERVAL = 0.05
+
+
+class SoundQueue:
+    """Fila de eventos sonoros sobre o loader de sons do pgzero."""
+
+    def __init__(self, loader, volume=VOLUME, channels=CHANNELS, min_interval=MIN_INTERVAL):
+        self.loader = loader
+        self.volume = volume
+        self.channel_count = channels
+        self.min_interval = min_interval
+        self.enabled = True
+        self.sounds = {}
+        self.pending = []
+        self.last_played = {}
+        self.channels = None
+        # Quando cada canal começou a tocar, para reaproveitar o mais antigo
+        self.started = []
+        self.played = 0
+        self.dropped = 0
+
+    def load(self, name):
+        """O Sound de name, já com o volume ajustado; None se o arquivo não existe."""
+        if name in self.sounds:
+            return self.sounds[name]
+        try:
+            sound = getattr(self.loader, name)
+            sound.set_volume(self.volume)
+        except AttributeError:
+            print(f"WARNING: '{name}.wav' sound file not found!")
+            sound = None
+        self.sounds[name] = sound
+        return sound
+
+    def preload(self, names):
+        for name in names:
+            self.load(name)
+
+    def push(self, name):
+        """Agenda o som para o próximo flush(); não chama o mixer."""
+        self.pending.append(name)
+
+    def _channel(self, now):
+        """Um canal livre do conjunto, ou o que começou a tocar há mais tempo."""
+        if self.channels is None:
+            pygame.mixer.set_reserved(self.channel_count)
+            self.channels = [pygame.mixer.Channel(i) for i in range(self.channel_count)]
+            self.started = [0.0] * self.channel_count
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                break
+        else:
+            i = min(range(self.channel_count), key=self.started.__getitem__)
+        self.started[i] = now
+        return self.channels[i]
+
+    def flush(self, now=None):
+        """Toca os sons pendentes, cada um no máximo uma vez."""
+        pending = self.pending
+        if not pending:
+            return
+        if not self.enabled or not pygame.mixer.get_init():
+            pending.clear()
+            return
+        if now is None:
+            now = time.perf_counter()
+        last_played = self.last_played
+        for name in dict.fromkeys(pending):
+            if name in last_played and now - last_played[name] < self.min_interval:
+                self.dropped += 1
+                continue
+            sound = self.load(name)
+            if sound is None:
+                continue
+            last_played[name] = now
+            self._channel(now).play(sound)
+            self.played += 1
+        self.dropped += len(pending) - len(set(pending))
+        pending.clear()
@@ -0,0 +1,298 @@
+"""
+Benchmark headless do Pixel Dash.
+
+Roda o loop do jogo (update() e draw() do pixel_dash, carregado como o
+pgzrun carrega) com os drivers dummy do SDL, seguindo uma sequência de teclas
+gerada a partir de uma semente fixa, em fases sintéticas de 1×, 10× e 100×
+LEVEL_LENGTH: a fase original repetida lado a lado, então blocos, moedas e
+inimigos crescem na mesma proporção. Cada escala roda num processo próprio,
+para o pico de memória de uma não contaminar a outra.
+
+O resultado sai em JSON (tempos por tick de update e draw, pico de RSS,
+alocações por tick e world_tick_us, o custo de um World.step sem janela nem
+desenho; na escala 1 é o da fase que vai com o jogo) e é comparado com benchmarks/baseline.json; se alguma
+métrica piorar além da tolerância, o script termina com código 1.
+
+Uso:
+    python benchmarks/bench.py                  # roda e compara com o baseline
+    python benchmarks/bench.py --save-baseline  # grava o resultado como baseline
+    python benchmarks/bench.py --scales 1 10 --ticks 500 --output out.json
+"""
+import argparse
+import copy
+import gc
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+SCALES = (1, 10, 100)
+TICKS = 2000
+ALLOC_TICKS = 200
+SEED = 1234
+# Quanto cada métrica pode piorar em relação ao baseline antes de falhar
+TOLERANCE = {"update_ms.mean": 0.25, "update_ms.p95": 0.35, "draw_ms.mean": 0.25,
+             "draw_ms.p95": 0.35, "peak_rss_kb": 0.25, "alloc_peak_bytes_per_tick": 0.5,
+             "world_tick_us": 0.4}
+WORLD_RUNS = 9
+
+
+def tiled_spec(spec, times):
+    """A fase repetida times vezes, cada cópia deslocada de length px."""
+    length = spec["length"]
+    tiled = copy.deepcopy(spec)
+    tiled["length"] = length * times
+    for group in ("blocks", "spikes", "coins"):
+        tiled[group] = [dict(entry, x=entry["x"] + i * length)
+                        for i in range(times) for entry in spec.get(group, [])]
+    tiled["checkpoints"] = [x + i * length for i in range(times)
+                            for x in spec.get("checkpoints", [])]
+    tiled["enemies"] = {}
+    for kind, entries in spec.get("enemies", {}).items():
+        tiled["enemies"][kind] = []
+        for i in range(times):
+            for entry in entries:
+                entry = dict(entry, x=entry["x"] + i * length)
+                if "patrol" in entry:
+                    entry["patrol"] = [x + i * length for x in entry["patrol"]]
+                tiled["enemies"][kind].append(entry)
+    return tiled
+
+
+def load_game():
+    """Carrega pixel_dash.py com os builtins do pgzero, sem entrar no loop."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    # Partidas sintéticas não entram na telemetria dos jogadores
+    os.environ.setdefault("PIXEL_DASH_TELEMETRY", "0")
+    sys.path.insert(0, ROOT)
+    from types import ModuleType
+
+    import pygame
+    from pgzero import runner
+    from pgzero.screen import Screen
+
+    path = os.path.join(ROOT, "pixel_dash.py")
+    mod = ModuleType("pixel_dash")
+    mod.__file__ = path
+    sys.modules["pixel_dash"] = mod
+    # Com _pgzrun, pgzrun.go() volta na hora, como quando o jogo roda via pgzrun
+    sys._pgzrun = True
+    runner.prepare_mod(mod)
+    with open(path, encoding="utf-8") as f:
+        exec(compile(f.read(), path, "exec"), mod.__dict__)
+    # O benchmark não toca som: tocando, a thread de áudio do SDL (mesmo com o
+    # driver dummy) derrubava o processo filho de vez em quando
+    mod.music_on = mod.sounds_on = mod.sound_queue.enabled = False
+    mod.screen = Screen(pygame.display.set_mode((mod.WIDTH, mod.HEIGHT)))
+    return mod
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    n = len(samples)
+
+    def at(q):
+        return round(samples[min(n - 1, int(q * n))], 4)
+
+    return {"mean": round(sum(samples) / n, 4), "p50": at(0.5), "p95": at(0.95),
+            "p99": at(0.99), "max": round(samples[-1], 4)}
+
+
+def world_tick_us(level, ticks, seed):
+    """
+    Microssegundos por World.step na fase, sem pgzero, com a mesma política
+    de teclas do loop do jogo; o melhor de WORLD_RUNS corridas. Uma corrida
+    dura uma fração de segundo, então o melhor de poucas ainda oscila 20-30%
+    numa máquina compartilhada.
+    """
+    from world import Inputs, World
+
+    rnd = random.Random(seed)
+    inputs = []
+    right = True
+    for t in range(ticks):
+        if t % 30 == 0:
+            right = rnd.random() < 0.8
+        inputs.append(Inputs(not right, right, int(rnd.random() < 0.06)))
+    world = World(level)
+    best = None
+    for _ in range(WORLD_RUNS):
+        world.reset(seed)
+        start = time.perf_counter()
+        for step_inputs in inputs:
+            world.step(step_inputs)
+            if world.state != "playing":
+                world.reset(seed)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best / ticks * 1e6, 1)
+
+
+def run_scale(scale, ticks, alloc_ticks, seed):
+    """Roda uma escala neste processo e devolve as métricas."""
+    mod = load_game()
+    from level_loader import DEFAULT_LEVEL, level_from_spec
+    from pgzero.constants import keys
+    from pgzero.keyboard import keyboard
+
+    with open(DEFAULT_LEVEL, encoding="utf-8") as f:
+        level = level_from_spec(tiled_spec(json.load(f), scale))
+    tick_us = world_tick_us(level, ticks, seed)
+    mod.load_content()
+    world = mod.world
+    world.load_level(level)
+    mod.reset_game()
+    mod.game_state = "playing"
+    dt = mod.timestep.step
+    rnd = random.Random(seed)
+    held = None
+
+    def tick(t):
+        nonlocal held
+        # A cada 30 ticks escolhe uma direção (80% para a direita) e às vezes pula
+        if t % 30 == 0:
+            if held is not None:
+                keyboard._release(held)
+            held = keys.RIGHT if rnd.random() < 0.8 else keys.LEFT
+            keyboard._press(held)
+        if rnd.random() < 0.06:
+            mod.on_key_down(keys.SPACE)
+        start = time.perf_counter()
+        mod.update(dt)
+        middle = time.perf_counter()
+        mod.draw()
+        end = time.perf_counter()
+        # O benchmark mede custo, não jogabilidade: morrer ou terminar não para a corrida
+        if mod.game_state != "playing":
+            world.state = mod.game_state = "playing"
+        return (middle - start) * 1000.0, (end - middle) * 1000.0
+
+    update_ms = []
+    draw_ms = []
+    for t in range(ticks):
+        u, d = tick(t)
+        update_ms.append(u)
+        draw_ms.append(d)
+
+    # Alocações à parte: o tracemalloc deixa tudo bem mais lento
+    gc.collect()
+    tracemalloc.start()
+    peaks = []
+    before_all = tracemalloc.get_traced_memory()[0]
+    for t in range(ticks, ticks + alloc_ticks):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        tick(t)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    net = tracemalloc.get_traced_memory()[0] - before_all
+    tracemalloc.stop()
+
+    return {
+        "scale": scale,
+        "level_length": level.length,
+        "ticks": ticks,
+        "final_x": round(world.player.x, 1),
+        "update_ms": percentiles(update_ms),
+        "draw_ms": percentiles(draw_ms),
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "alloc_peak_bytes_per_tick": round(sum(peaks) / len(peaks)),
+        "alloc_net_bytes_per_tick": round(net / alloc_ticks),
+        "world_tick_us": tick_us,
+    }
+
+
+def run(scales, ticks, alloc_ticks, seed):
+    results = {}
+    for scale in scales:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", str(scale),
+             "--ticks", str(ticks), "--alloc-ticks", str(alloc_ticks), "--seed", str(seed)],
+            check=True, stdout=subprocess.PIPE, text=True).stdout
+        # O pygame escreve a saudação no stdout; o resultado é a última linha
+        results[str(scale)] = json.loads(out.strip().splitlines()[-1])
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "results": results,
+    }
+
+
+def metric(result, name):
+    value = result
+    for key in name.split("."):
+        value = value[key]
+    return value
+
+
+def compare(report, baseline):
+    """Lista de regressões (texto) em relação ao baseline."""
+    regressions = []
+    for scale, result in report["results"].items():
+        base = baseline["results"].get(scale)
+        if base is None:
+            continue
+        for name, tolerance in TOLERANCE.items():
+            if name.split(".")[0] not in base:
+                # Métrica mais nova que o baseline
+                continue
+            new = metric(result, name)
+            old = metric(base, name)
+            change = (new - old) / old if old else 0.0
+            status = "REGRESSÃO" if change > tolerance else "ok"
+            print(f"{scale:>4}x  {name:<26}{old:>12}{new:>12}{change:>+9.1%}  {status}")
+            if change > tolerance:
+                regressions.append(f"{scale}x {name}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES)
+    parser.add_argument("--ticks", type=int, default=TICKS)
+    parser.add_argument("--alloc-ticks", type=int, default=ALLOC_TICKS)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", help="grava o relatório JSON neste arquivo")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        print(json.dumps(run_scale(args.child, args.ticks, args.alloc_ticks, args.seed)))
+        return 0
+
+    report = run(args.scales, args.ticks, args.alloc_ticks, args.seed)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(text + "\n")
+        print(f"Baseline salvo em {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("Sem baseline para comparar; rode com --save-baseline.")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(report, json.load(f))
+    if regressions:
+        print("\nREGRESSÕES:\n  " + "\n  ".join(regressions), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
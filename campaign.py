@@ -0,0 +1,98 @@
+"""
+Campanha: as fases de levels/campaign.json jogadas em sequência.
+
+Enquanto uma fase é jogada, a próxima é montada no worker do Preloader (a
+mesma thread que leu a primeira fase e aqueceu o áudio): LevelData, World
+com os atores do começo da fase já no lugar, camada estática com os chunks
+da câmera inicial assados e a música da fase lida do disco. Ao passar da
+bandeira, trocar de fase é só trocar referências. As últimas RECENT fases
+montadas ficam num cache LRU, então jogar de novo e voltar para a fase
+anterior também não esperam nada.
+
+Quem monta cada fase é a função build(index, path) de quem usa a campanha;
+aqui ficam só a ordem, a pré-busca e o cache.
+"""
+import json
+import os
+from collections import OrderedDict
+
+from level_loader import DEFAULT_LEVEL, LEVELS_DIR, LevelError
+
+CAMPAIGN_FILE = os.path.join(LEVELS_DIR, "campaign.json")
+# Fases montadas mantidas em memória: a anterior, a atual e a próxima
+RECENT = 3
+
+
+def campaign_paths(path=CAMPAIGN_FILE):
+    """Caminhos das fases da campanha, em ordem; sem a lista, só a fase padrão."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            names = json.load(f)["levels"]
+    except OSError:
+        return [DEFAULT_LEVEL]
+    except (ValueError, KeyError, TypeError) as e:
+        raise LevelError(f"{path}: {e}") from None
+    if not names:
+        raise LevelError(f"{path}: a campanha precisa de pelo menos uma fase")
+    return [os.path.join(os.path.dirname(path), name) for name in names]
+
+
+class Stage:
+    """Uma fase montada: os dados, o World dela e a camada estática assada."""
+
+    def __init__(self, index, level, world, static_layer):
+        self.index = index
+        self.level = level
+        self.world = world
+        self.static_layer = static_layer
+        # O World ainda está como a montagem deixou, pronto para a primeira partida
+        self.fresh = True
+
+
+class Campaign:
+    """Ordem das fases, pré-busca da próxima no executor e cache LRU das recentes."""
+
+    def __init__(self, build, executor, paths=None, recent=RECENT):
+        self.build = build
+        self.executor = executor
+        self.paths = paths or campaign_paths()
+        self.recent = recent
+        # índice -> Future do Stage, da menos para a mais recente
+        self.stages = OrderedDict()
+        self.index = None
+
+    def __len__(self):
+        return len(self.paths)
+
+    def has(self, index):
+        return 0 <= index < len(self.paths)
+
+    def prefetch(self, index):
+        """Agenda a montagem da fase index no worker, se ela ainda não está no cache."""
+        if not self.has(index) or index in self.stages:
+            return
+        self.stages[index] = self.executor.submit(self.build, index, self.paths[index])
+        self._trim()
+
+    def enter(self, index):
+        """A fase index montada, que passa a ser a atual; espera a montagem se preciso."""
+        self.prefetch(index)
+        self.stages.move_to_end(index)
+        future = self.stages[index]
+        try:
+            stage = future.result()
+        except Exception:
+            # Não deixa um erro de montagem preso no cache
+            del self.stages[index]
+            raise
+        self.index = index
+        self._trim()
+        return stage
+
+    def _trim(self):
+        # Descarta as menos recentes, mas nunca a atual nem uma montagem em andamento
+        for index in list(self.stages):
+            if len(self.stages) <= self.recent:
+                break
+            if index != self.index and self.stages[index].done():
+                del self.stages[index]
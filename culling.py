@@ -0,0 +1,82 @@
+"""
+Culling pela janela da câmera.
+Cada tipo de entidade fica numa lista ordenada pelo x de desenho; a cada
+frame só o trecho que cruza [camera_x - margem, camera_x + WIDTH + margem]
+é devolvido, achado por bisseção.
+"""
+from bisect import bisect_left, bisect_right
+
+CULL_MARGIN = 64
+
+
+class SortedXList:
+    """
+    Entidades ordenadas pelo x em que são desenhadas (o draw_game usa o
+    x do centro como canto esquerdo, então a imagem ocupa [x, x + width]).
+    Só guarda entidades paradas; inimigos são culled pelo EnemyEngine.
+    """
+    __slots__ = ("boxes", "xs", "max_width")
+
+    def __init__(self):
+        self.boxes = []
+        self.xs = []
+        self.max_width = 0
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def clear(self):
+        self.boxes.clear()
+        self.xs.clear()
+        self.max_width = 0
+
+    def add(self, box):
+        x = box.x
+        i = bisect_right(self.xs, x)
+        self.boxes.insert(i, box)
+        self.xs.insert(i, x)
+        if box.width > self.max_width:
+            self.max_width = box.width
+
+    def remove(self, box):
+        boxes = self.boxes
+        for i in range(bisect_left(self.xs, box.x), len(boxes)):
+            if boxes[i] is box:
+                del boxes[i]
+                del self.xs[i]
+                return
+
+    def window(self, lo, hi):
+        """Entidades cuja imagem pode cruzar [lo, hi]."""
+        xs = self.xs
+        return self.boxes[bisect_left(xs, lo - self.max_width):bisect_right(xs, hi)]
+
+
+class DrawIndex:
+    """Uma SortedXList por tipo, mais a contagem de blits evitados."""
+
+    def __init__(self, kinds):
+        self.lists = {kind: SortedXList() for kind in kinds}
+        self.skipped = 0
+
+    def clear(self):
+        for entries in self.lists.values():
+            entries.clear()
+
+    def add(self, kind, box):
+        self.lists[kind].add(box)
+
+    def remove(self, kind, box):
+        self.lists[kind].remove(box)
+
+    def visible(self, lo, hi, kinds=None):
+        """Devolve {tipo: entidades visíveis} e atualiza skipped."""
+        view = {}
+        total = drawn = 0
+        for kind in kinds or self.lists:
+            entries = self.lists[kind]
+            boxes = view[kind] = entries.window(lo, hi)
+            total += len(entries)
+            drawn += len(boxes)
+        self.skipped = total - drawn
+        return view
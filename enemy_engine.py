@@ -0,0 +1,460 @@
+"""
+Motor de inimigos em structure-of-arrays.
+Cada tipo de inimigo guarda seus campos em arrays NumPy (posição, direção,
+velocidade, limites de patrulha, timers...) e é atualizado com poucas
+operações vetorizadas por tick. O quadro de animação não é por inimigo: vem
+do relógio compartilhado do tipo, no World.
+
+As posições ficam em left/top, como no Entity, e cada conta repete a
+aritmética do código por dicionário, para os resultados serem idênticos.
+
+Com streaming, os arrays guardam só os inimigos carregados: a cada tick só os
+que estão dentro da janela ativa são simulados (os demais "dormem") e os que
+saem da janela carregada são descartados.
+
+update(dt) recebe a duração do tick em ticks de BASE_HZ: velocidades e timers
+são multiplicados por dt, e o pulo dos jumpers soma os dt ticks de forma
+fechada, para o arco não mudar com SIM_HZ. Com dt = 1 as contas são as
+mesmas de antes.
+prev_left/prev_top guardam a posição do tick anterior para a interpolação.
+
+Cada operação NumPy tem um custo fixo de ~1 us, que numa fase normal (poucos
+inimigos carregados por tipo) pesa mais que a conta em si. Grupos com até
+SCALAR_MAX inimigos carregados andam um inimigo por vez (update_one), com
+exatamente a mesma aritmética da versão vetorizada.
+"""
+from math import sin
+
+import numpy as np
+
+from entities import sprite_size
+from settings import GRAVITY
+
+INF = float("inf")
+SCALAR_MAX = 8
+# Gravidade do pulo dos jumpers, por tick de BASE_HZ
+JUMPER_GRAVITY = GRAVITY * 0.6
+
+
+class EnemyGroup:
+    """
+    Todos os inimigos de um tipo. Subclasses definem frames, period (ticks
+    por quadro de animação) e update(idx, dt).
+    """
+    FIELDS = (("uid", np.int64), ("left", np.float64), ("top", np.float64),
+              ("prev_left", np.float64), ("prev_top", np.float64),
+              ("dir", np.float64), ("speed", np.float64), ("alive", np.bool_))
+    EXTRA_FIELDS = ()
+    frames = ()
+    period = 0
+
+    def __init__(self, capacity=16):
+        self.width, self.height = sprite_size(self.frames[0])
+        self.hw = self.width * 0.5
+        self.hh = self.height * 0.5
+        self.n = 0
+        self.capacity = capacity
+        for name, dtype in self.FIELDS + self.EXTRA_FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype))
+        # uids (índice na fase) dos inimigos já derrotados nesta partida; os
+        # abaixo de uid_floor contam todos como derrotados (forget_below)
+        self.killed = set()
+        self.uid_floor = 0
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive[:self.n]))
+
+    def clear(self):
+        for name, _ in self.FIELDS + self.EXTRA_FIELDS:
+            getattr(self, name)[:self.n] = 0
+        self.n = 0
+        self.killed.clear()
+        self.uid_floor = 0
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, _ in self.FIELDS + self.EXTRA_FIELDS:
+            old = getattr(self, name)
+            new = np.zeros(self.capacity, old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, pos, **fields):
+        """Cria um inimigo centrado em pos; os demais campos vêm por nome."""
+        if self.n == self.capacity:
+            self._grow()
+        i = self.n
+        x, y = pos
+        self.left[i] = x - self.hw
+        self.top[i] = y - self.hh
+        self.alive[i] = True
+        for name, value in fields.items():
+            getattr(self, name)[i] = value
+        self.n += 1
+        return i
+
+    def spawn(self, table):
+        """
+        Acrescenta as linhas de table (arrays por campo, com "uid") que não
+        estão carregadas nem foram derrotadas.
+        """
+        uids = table.get("uid")
+        if uids is None:
+            uids = np.arange(len(table["x"]))
+        keep = ~np.isin(uids, self.uid[:self.n])
+        if self.uid_floor:
+            keep &= uids >= self.uid_floor
+        if self.killed:
+            keep &= ~np.isin(uids, list(self.killed))
+        k = int(np.count_nonzero(keep))
+        if not k:
+            return
+        while self.capacity < self.n + k:
+            self._grow()
+        rows = slice(self.n, self.n + k)
+        for name, _ in self.FIELDS + self.EXTRA_FIELDS:
+            getattr(self, name)[rows] = 0
+        self.uid[rows] = uids[keep]
+        self.left[rows] = self.prev_left[rows] = table["x"][keep] - self.hw
+        self.top[rows] = self.prev_top[rows] = table["y"][keep] - self.hh
+        self.alive[rows] = True
+        for name, values in table.items():
+            if name not in ("x", "y", "uid"):
+                getattr(self, name)[rows] = values[keep]
+        self.n += k
+
+    def compact(self, keep):
+        """Fica só com as linhas marcadas em keep (máscara sobre [:n])."""
+        n = self.n
+        m = int(np.count_nonzero(keep))
+        for name, _ in self.FIELDS + self.EXTRA_FIELDS:
+            column = getattr(self, name)
+            column[:m] = column[:n][keep]
+            column[m:n] = 0
+        self.n = m
+
+    def snapshot(self):
+        """Cópia das linhas carregadas e dos uids derrotados, para restore()."""
+        n = self.n
+        columns = {name: getattr(self, name)[:n].copy()
+                   for name, _ in self.FIELDS + self.EXTRA_FIELDS}
+        return n, columns, frozenset(self.killed), self.uid_floor
+
+    def restore(self, state):
+        """Volta ao estado de snapshot(), sem realocar se a capacidade basta."""
+        n, columns, killed, self.uid_floor = state
+        while self.capacity < n:
+            self._grow()
+        old = self.n
+        for name, values in columns.items():
+            column = getattr(self, name)
+            column[:n] = values
+            column[n:old] = 0
+        self.n = n
+        self.killed = set(killed)
+
+    def unload_outside(self, lo, hi):
+        """Descarta os inimigos cujo centro saiu de [lo, hi), e os mortos."""
+        n = self.n
+        if n <= SCALAR_MAX:
+            left = self.left
+            alive = self.alive
+            hw = self.hw
+            for i in range(n):
+                if not (alive[i] and lo <= left[i] + hw < hi):
+                    break
+            else:
+                return
+        x = self.left[:n] + self.hw
+        keep = self.alive[:n] & (x >= lo) & (x < hi)
+        if not keep.all():
+            self.compact(keep)
+
+    def active(self, lo, hi):
+        """Índices dos inimigos vivos com o centro em [lo, hi)."""
+        n = self.n
+        if n <= SCALAR_MAX:
+            left = self.left
+            alive = self.alive
+            hw = self.hw
+            return [i for i in range(n) if alive[i] and lo <= left[i] + hw < hi]
+        alive = self.alive[:n]
+        if lo == -INF and hi == INF:
+            return np.flatnonzero(alive)
+        x = self.left[:n] + self.hw
+        return np.flatnonzero(alive & (x >= lo) & (x < hi))
+
+    def kill(self, i):
+        self.alive[i] = False
+        self.killed.add(int(self.uid[i]))
+
+    def remember(self):
+        """Guarda a posição atual como a do tick anterior."""
+        n = self.n
+        if not n:
+            return
+        self.prev_left[:n] = self.left[:n]
+        self.prev_top[:n] = self.top[:n]
+
+    def patrol(self, idx, step):
+        """Anda step px e inverte a direção fora de [patrol_left, patrol_right]."""
+        hw = self.hw
+        left = (self.left[idx] + hw + step) - hw
+        self.left[idx] = left
+        x = left + hw
+        turn = (x < self.patrol_left[idx]) | (x > self.patrol_right[idx])
+        self.dir[idx[turn]] *= -1
+
+    def patrol_one(self, i, step):
+        """patrol() de um inimigo só."""
+        hw = self.hw
+        left = (self.left[i] + hw + step) - hw
+        self.left[i] = left
+        x = left + hw
+        if x < self.patrol_left[i] or x > self.patrol_right[i]:
+            self.dir[i] *= -1
+
+    def overlapping(self, left, top, right, bottom):
+        """Índices dos inimigos vivos cujo retângulo cruza o informado."""
+        n = self.n
+        if n <= SCALAR_MAX:
+            lefts = self.left
+            tops = self.top
+            alive = self.alive
+            width = self.width
+            height = self.height
+            return [i for i in range(n)
+                    if alive[i] and lefts[i] < right and lefts[i] + width > left
+                    and tops[i] < bottom and tops[i] + height > top]
+        lefts = self.left[:n]
+        tops = self.top[:n]
+        mask = (self.alive[:n] & (lefts < right) & (lefts + self.width > left) &
+                (tops < bottom) & (tops + self.height > top))
+        return np.flatnonzero(mask)
+
+    def positions(self, idx, alpha=1.0):
+        """
+        Centros (xs, ys) dos inimigos idx, interpolados entre o tick anterior
+        (alpha = 0) e o atual (alpha = 1).
+        """
+        left = self.left[idx]
+        top = self.top[idx]
+        if alpha != 1.0:
+            prev_left = self.prev_left[idx]
+            prev_top = self.prev_top[idx]
+            left = prev_left + (left - prev_left) * alpha
+            top = prev_top + (top - prev_top) * alpha
+        return (left + self.hw).tolist(), (top + self.hh).tolist()
+
+
+class Walkers(EnemyGroup):
+    EXTRA_FIELDS = (("patrol_left", np.float64), ("patrol_right", np.float64))
+    frames = ("enemy_walk_1", "enemy_walk_2")
+    period = 10
+
+    def update(self, idx, dt):
+        self.patrol(idx, self.dir[idx] * 1.4 * dt)
+
+    def update_one(self, i, dt):
+        self.patrol_one(i, self.dir[i] * 1.4 * dt)
+
+
+class Flyers(EnemyGroup):
+    EXTRA_FIELDS = (("patrol_left", np.float64), ("patrol_right", np.float64))
+    frames = ("enemy_fly_1", "enemy_fly_2", "enemy_fly_3")
+    period = 8
+
+    def update(self, idx, dt):
+        self.patrol(idx, self.dir[idx] * self.speed[idx] * dt)
+
+    def update_one(self, i, dt):
+        self.patrol_one(i, self.dir[i] * self.speed[i] * dt)
+
+
+class Jumpers(EnemyGroup):
+    EXTRA_FIELDS = (("jump_count", np.int64), ("pause_timer", np.float64),
+                    ("y_start", np.float64), ("jumping", np.bool_),
+                    ("fall_speed", np.float64))
+    frames = ("enemy_jump",)
+
+    def update(self, idx, dt):
+        hh = self.hh
+        pause_timer = self.pause_timer[idx]
+        jumping = self.jumping[idx]
+        fall_speed = self.fall_speed[idx]
+        jump_count = self.jump_count[idx]
+        top = self.top[idx]
+        y_start = self.y_start[idx]
+
+        paused = pause_timer > 0
+        pause_timer[paused] -= dt
+        start = ~paused & ~jumping
+        jumping[start] = True
+        fall_speed[start] = -8
+        jump_count[start] += 1
+
+        air = jumping.copy()
+        top[air] = (top[air] + hh + (fall_speed[air] * dt + JUMPER_GRAVITY * dt * (dt - 1) * 0.5)) - hh
+        fall_speed[air] += JUMPER_GRAVITY * dt
+        landed = air & (top + hh >= y_start)
+        top[landed] = y_start[landed] - hh
+        jumping[landed] = False
+        rest = landed & (jump_count >= 2)
+        jump_count[rest] = 0
+        pause_timer[rest] = 60
+
+        self.pause_timer[idx] = pause_timer
+        self.jumping[idx] = jumping
+        self.fall_speed[idx] = fall_speed
+        self.jump_count[idx] = jump_count
+        self.top[idx] = top
+        self.left[idx] = (self.left[idx] + self.hw + dt) - self.hw
+
+    def update_one(self, i, dt):
+        hh = self.hh
+        jumping = self.jumping[i]
+        if self.pause_timer[i] > 0:
+            self.pause_timer[i] -= dt
+        elif not jumping:
+            jumping = self.jumping[i] = True
+            self.fall_speed[i] = -8
+            self.jump_count[i] += 1
+        if jumping:
+            fall_speed = self.fall_speed[i]
+            top = (self.top[i] + hh + (fall_speed * dt + JUMPER_GRAVITY * dt * (dt - 1) * 0.5)) - hh
+            self.top[i] = top
+            self.fall_speed[i] = fall_speed + JUMPER_GRAVITY * dt
+            y_start = self.y_start[i]
+            if top + hh >= y_start:
+                self.top[i] = y_start - hh
+                self.jumping[i] = False
+                if self.jump_count[i] >= 2:
+                    self.jump_count[i] = 0
+                    self.pause_timer[i] = 60
+        self.left[i] = (self.left[i] + self.hw + dt) - self.hw
+
+
+class Swoopers(EnemyGroup):
+    EXTRA_FIELDS = (("x_start", np.float64), ("y_start", np.float64),
+                    ("amplitude", np.float64), ("frequency", np.float64))
+    frames = ("enemy_swoop_1", "enemy_swoop_2", "enemy_swoop_3")
+    period = 8
+
+    def update(self, idx, dt):
+        hw = self.hw
+        left = (self.left[idx] + hw + self.speed[idx] * self.dir[idx] * dt) - hw
+        self.left[idx] = left
+        wave = np.sin((left + hw - self.x_start[idx]) * self.frequency[idx])
+        self.top[idx] = (self.y_start[idx] + self.amplitude[idx] * wave) - self.hh
+
+    def update_one(self, i, dt):
+        hw = self.hw
+        left = (self.left[i] + hw + self.speed[i] * self.dir[i] * dt) - hw
+        self.left[i] = left
+        wave = sin((left + hw - self.x_start[i]) * self.frequency[i])
+        self.top[i] = (self.y_start[i] + self.amplitude[i] * wave) - self.hh
+
+
+class EnemyEngine:
+    """Os quatro grupos de inimigos, na ordem em que o jogo os processa."""
+
+    def __init__(self):
+        self.groups = {
+            "walkers": Walkers(),
+            "flyers": Flyers(),
+            "jumpers": Jumpers(),
+            "swoopers": Swoopers()
+        }
+        self.skipped = 0
+        self.simulated = 0
+        # Janelas do streaming, em x de centro: [lo, hi)
+        self.active_window = (-INF, INF)
+        self.loaded_window = (-INF, INF)
+
+    def clear(self):
+        for group in self.groups.values():
+            group.clear()
+
+    def spawn(self, source, lo, hi):
+        """Carrega da fase os inimigos que nascem com o centro em [lo, hi)."""
+        for kind, group in self.groups.items():
+            group.spawn(source.rows_in(kind, lo, hi))
+
+    def forget_below(self, floor):
+        """Passa a tratar todo uid < floor como derrotado e solta esses uids de killed."""
+        for group in self.groups.values():
+            group.uid_floor = floor
+            group.killed = {uid for uid in group.killed if uid >= floor}
+
+    def snapshot(self):
+        return {kind: group.snapshot() for kind, group in self.groups.items()}
+
+    def restore(self, state):
+        for kind, group in self.groups.items():
+            group.restore(state[kind])
+
+    def set_windows(self, active, loaded):
+        self.active_window = active
+        self.loaded_window = loaded
+
+    def update(self, dt=1.0):
+        lo, hi = self.active_window
+        simulated = 0
+        for group in self.groups.values():
+            if not group.n:
+                continue
+            group.remember()
+            idx = group.active(lo, hi)
+            if group.n <= SCALAR_MAX:
+                for i in idx:
+                    group.update_one(i, dt)
+            elif len(idx):
+                group.update(idx, dt)
+            simulated += len(idx)
+        self.simulated = simulated
+
+    def unload_outside(self):
+        """Descarta quem saiu da janela carregada (não vale sem streaming)."""
+        lo, hi = self.loaded_window
+        if lo != -INF or hi != INF:
+            for group in self.groups.values():
+                group.unload_outside(lo, hi)
+
+    def near(self, left, top, right, bottom):
+        """[(tipo, grupo, índices)] dos inimigos que cruzam o retângulo."""
+        found = []
+        for kind, group in self.groups.items():
+            idx = group.overlapping(left, top, right, bottom)
+            if len(idx):
+                found.append((kind, group, idx))
+        return found
+
+    def visible(self, lo, hi, alpha=1.0):
+        """
+        [(tipo, xs, ys)] dos inimigos cuja imagem (desenhada em [x, x + width])
+        pode cruzar [lo, hi], com as posições interpoladas por alpha.
+        """
+        found = []
+        total = drawn = 0
+        for kind, group in self.groups.items():
+            n = group.n
+            if not n:
+                continue
+            if n <= SCALAR_MAX:
+                left = group.left
+                alive = group.alive
+                hw = group.hw
+                width = group.width
+                live = [i for i in range(n) if alive[i]]
+                total += len(live)
+                idx = [i for i in live if left[i] + hw + width >= lo and left[i] + hw <= hi]
+            else:
+                x = group.left[:n] + group.hw
+                alive = group.alive[:n]
+                total += int(np.count_nonzero(alive))
+                idx = np.flatnonzero(alive & (x + group.width >= lo) & (x <= hi))
+            if len(idx):
+                found.append((kind,) + group.positions(idx, alpha))
+                drawn += len(idx)
+        self.skipped = total - drawn
+        return found
@@ -0,0 +1,122 @@
+"""
+Entidades headless: tamanhos de sprite e retângulos equivalentes ao Actor,
+sem carregar imagens nem depender do pgzero.
+"""
+import os
+import struct
+
+from settings import HEIGHT
+
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+
+_sprite_sizes = {}
+
+
+def sprite_size(name):
+    """Lê largura e altura do PNG direto do cabeçalho, sem carregar a imagem."""
+    size = _sprite_sizes.get(name)
+    if size is None:
+        with open(os.path.join(IMAGES_DIR, name + ".png"), "rb") as f:
+            header = f.read(24)
+        size = _sprite_sizes[name] = struct.unpack(">II", header[16:24])
+    return size
+
+
+def ground_top_y():
+    """Calculates the Y position of the top of the ground sprite."""
+    return HEIGHT - sprite_size("ground")[1]
+
+
+class Entity:
+    """
+    Equivalente headless do Actor: retângulo ancorado no centro.
+    Guarda left/top como o ZRect do pgzero, para que a aritmética
+    de posição dê exatamente os mesmos resultados.
+    """
+    __slots__ = ("image", "left", "top", "width", "height")
+
+    def __init__(self, image, pos):
+        self.image = image
+        self.width, self.height = sprite_size(image)
+        self.x, self.y = pos
+
+    @property
+    def x(self):
+        return self.left + self.width * 0.5
+
+    @x.setter
+    def x(self, px):
+        self.left = px - self.width * 0.5
+
+    @property
+    def y(self):
+        return self.top + self.height * 0.5
+
+    @y.setter
+    def y(self, py):
+        self.top = py - self.height * 0.5
+
+    @property
+    def pos(self):
+        return self.x, self.y
+
+    @pos.setter
+    def pos(self, pos):
+        self.x, self.y = pos
+
+    @property
+    def right(self):
+        return self.left + self.width
+
+    @right.setter
+    def right(self, value):
+        self.left = value - self.width
+
+    @property
+    def bottom(self):
+        return self.top + self.height
+
+    @bottom.setter
+    def bottom(self, value):
+        self.top = value - self.height
+
+    def colliderect(self, other):
+        return (self.left < other.left + other.width and
+                self.top < other.top + other.height and
+                self.left + self.width > other.left and
+                self.top + self.height > other.top)
+
+
+class Player(Entity):
+    __slots__ = ("vy", "on_ground", "jumps_left")
+
+    def __init__(self, image, pos):
+        super().__init__(image, pos)
+        self.vy = 0
+        self.on_ground = False
+        self.jumps_left = 2
+
+
+class AnimationClock:
+    """
+    Relógio de animação compartilhado por todas as entidades de um tipo:
+    avança um quadro a cada period ticks. Com period 0, fica no quadro 0.
+    """
+    __slots__ = ("frames", "period", "timer", "frame")
+
+    def __init__(self, frames, period):
+        self.frames = frames
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.timer = 0
+        self.frame = 0
+
+    def advance(self, dt):
+        if not self.period:
+            return
+        self.timer += dt
+        while self.timer >= self.period:
+            self.timer -= self.period
+            self.frame = (self.frame + 1) % self.frames
@@ -0,0 +1,381 @@
+"""
+Ambiente no estilo gym para bots, sem janela nem pgzero.
+
+PixelDashEnv embrulha um World: reset() começa uma partida e step(action)
+avança frame_skip ticks com a ação, devolvendo (obs, recompensa, terminou,
+truncou, info) como no gymnasium. A observação é um vetor float32 de
+OBS_SIZE posições: o estado do player e, relativos a ele, as ameaças
+(inimigos e espinhos), os blocos e as moedas mais próximos em x.
+
+VectorEnv roda N ambientes em lotes num pool de processos. Ações,
+observações e recompensas ficam em memória compartilhada: a cada step o
+processo principal só escreve as ações e espera os workers na barreira, sem
+serializar nada. Ambientes que terminam são reiniciados na hora, e a
+observação devolvida já é a do episódio novo.
+
+Os workers só rendem com mais de um núcleo livre: cada step do lote custa
+duas esperas na barreira, e numa máquina de um núcleo os processos disputam
+a mesma CPU. Numa máquina assim (três rodadas, com bastante ruído): com 8
+ambientes e 600 steps, 0 ou 1 worker ficam entre 7.700 e 9.500 steps/s e 4
+workers entre 5.500 e 6.700; com 64 ambientes e 200 steps, 0 workers ficam
+entre 8.800 e 10.700 e 4 workers entre 7.000 e 9.300. Por isso, sem workers
+explícito, uma máquina de um núcleo roda tudo no próprio processo. O ganho
+com vários núcleos não foi medido; confira na máquina de treino antes de
+escolher workers.
+
+    python env.py --envs 64 --workers 4     # mede passos por segundo
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+import traceback
+
+import numpy as np
+
+from entities import sprite_size
+from level_loader import DEFAULT_LEVEL, load_level
+from settings import HEIGHT, JUMP_POWER, SIM_HZ
+from world import Inputs, NO_INPUT, World
+
+# Ações discretas: nada, esquerda, direita e as três com um pulo
+ACTIONS = (NO_INPUT, Inputs(True, False, 0), Inputs(False, True, 0),
+           Inputs(False, False, 1), Inputs(True, False, 1), Inputs(False, True, 1))
+
+# Até onde (px, em cada direção) o player "enxerga", e quantos de cada tipo
+OBS_RANGE = 400
+MAX_THREATS = 6
+MAX_BLOCKS = 6
+MAX_COINS = 3
+# player: x/comprimento, y/altura da tela, vy, no chão, pulos restantes
+PLAYER_FEATURES = 5
+# ameaça: presente, dx, dy, é espinho / bloco: presente, dx, dy, largura,
+# altura / moeda: presente, dx, dy; distâncias em unidades de OBS_RANGE
+OBS_SIZE = PLAYER_FEATURES + 4 * MAX_THREATS + 5 * MAX_BLOCKS + 3 * MAX_COINS
+
+PROGRESS_REWARD = 0.01  # por px andado para a direita
+COIN_REWARD = 1.0
+DEATH_PENALTY = -10.0
+FINISH_REWARD = 10.0
+MAX_TICKS = 180 * SIM_HZ
+
+# Comandos do VectorEnv para os workers
+STEP, RESET, CLOSE = range(3)
+
+
+# Códigos de tipo na tabela estática do PixelDashEnv
+SPIKE, BLOCK, COIN = range(3)
+
+
+def _nearest(found, count, size, out, first):
+    """Escreve em out[first:] as count linhas mais próximas em |dx|, completando com zeros."""
+    found.sort(key=lambda row: abs(row[1]))
+    flat = []
+    for row in found[:count]:
+        flat.extend(row)
+    end = first + len(flat)
+    out[first:end] = flat
+    out[end:first + size * count] = 0.0
+
+
+class PixelDashEnv:
+    """Uma partida do Pixel Dash com a interface reset()/step() do gym."""
+
+    action_count = len(ACTIONS)
+    observation_size = OBS_SIZE
+
+    def __init__(self, level=DEFAULT_LEVEL, frame_skip=1, max_ticks=MAX_TICKS,
+                 streaming=True, sim_hz=SIM_HZ):
+        self.world = World(load_level(level), streaming=streaming, sim_hz=sim_hz)
+        self.static = self.static_table()
+        self.frame_skip = frame_skip
+        self.max_ticks = max_ticks
+
+    def static_table(self):
+        """
+        (xs, linhas) com blocos, espinhos e moedas da fase ordenados por x,
+        cada linha com tipo, x, y, a e b: para blocos, a largura e a altura em
+        unidades de OBS_RANGE; para moedas, a é o uid, para tirar as coletadas.
+        """
+        level = self.world.level
+        scale = 1.0 / OBS_RANGE
+        sizes = np.array([sprite_size(image) for image in level.images], np.float64) * scale
+        blocks = level.table("blocks")
+        spikes = level.table("spikes")
+        coins = level.table("coins")
+        block_size = sizes[blocks["image"]]
+        parts = [(BLOCK, blocks["x"], blocks["y"], block_size[:, 0], block_size[:, 1]),
+                 (SPIKE, spikes["x"], spikes["y"], 0, 0),
+                 (COIN, coins["x"], coins["y"], np.arange(len(coins["x"])), 0)]
+        rows = np.concatenate([np.column_stack(np.broadcast_arrays(kind, x, y, a, b))
+                               for kind, x, y, a, b in parts]).astype(np.float64)
+        order = np.argsort(rows[:, 1], kind="stable")
+        rows = rows[order]
+        return rows[:, 1].copy(), rows
+
+    def reset(self, seed=None, out=None):
+        """Começa uma partida e devolve (obs, info)."""
+        self.world.reset(seed)
+        return self.observe(out), self.info()
+
+    def step(self, action, out=None):
+        """
+        Aplica a ação (índice em ACTIONS) por frame_skip ticks e devolve
+        (obs, recompensa, terminou, truncou, info). Com out, a observação é
+        escrita nele em vez de num array novo.
+        """
+        world = self.world
+        player = world.player
+        inputs = ACTIONS[action]
+        x = player.x
+        score = world.score
+        for _ in range(self.frame_skip):
+            world.step(inputs)
+            if world.state != "playing":
+                break
+        reward = (player.x - x) * PROGRESS_REWARD + (world.score - score) * COIN_REWARD
+        terminated = world.state != "playing"
+        if world.state == "game_over":
+            reward += DEATH_PENALTY
+        elif world.state == "complete":
+            reward += FINISH_REWARD
+        truncated = not terminated and world.tick >= self.max_ticks
+        return self.observe(out), reward, terminated, truncated, self.info()
+
+    def info(self):
+        world = self.world
+        return {"tick": world.tick, "score": world.score, "x": world.player.x,
+                "state": world.state}
+
+    def observe(self, out=None):
+        """
+        O vetor de observação do estado atual. Os itens da fase vêm de uma
+        fatia da tabela estática ordenada por x e os inimigos dos arrays do
+        EnemyEngine; são poucos por observação, então o resto é em Python.
+        """
+        world = self.world
+        player = world.player
+        px = player.x
+        py = player.y
+        scale = 1.0 / OBS_RANGE
+        if out is None:
+            out = np.empty(OBS_SIZE, np.float32)
+        out[:PLAYER_FEATURES] = (px / world.level.length, py / HEIGHT, player.vy / JUMP_POWER,
+                                 player.on_ground, player.jumps_left / 2)
+
+        threats = []
+        blocks = []
+        coins = []
+        collected = world.collected
+        xs, rows = self.static
+        first = xs.searchsorted(px - OBS_RANGE)
+        last = xs.searchsorted(px + OBS_RANGE, "right")
+        # a e b: largura e altura de um bloco, ou o uid de uma moeda
+        for kind, x, y, a, b in rows[first:last].tolist():
+            dy = (y - py) * scale
+            if abs(dy) > 1.0:
+                continue
+            dx = (x - px) * scale
+            if kind == BLOCK:
+                blocks.append((1.0, dx, dy, a, b))
+            elif kind == SPIKE:
+                threats.append((1.0, dx, dy, 1.0))
+            elif a not in collected:
+                coins.append((1.0, dx, dy))
+        box = (px - OBS_RANGE, py - OBS_RANGE, px + OBS_RANGE, py + OBS_RANGE)
+        for kind, group, indices in world.enemy_engine.near(*box):
+            xs, ys = group.positions(indices)
+            for x, y in zip(xs, ys):
+                threats.append((1.0, (x - px) * scale, (y - py) * scale, 0.0))
+
+        first = PLAYER_FEATURES
+        _nearest(threats, MAX_THREATS, 4, out, first)
+        first += 4 * MAX_THREATS
+        _nearest(blocks, MAX_BLOCKS, 5, out, first)
+        first += 5 * MAX_BLOCKS
+        _nearest(coins, MAX_COINS, 3, out, first)
+        return out
+
+
+class _Buffers:
+    """Arrays numpy sobre a memória compartilhada do VectorEnv."""
+
+    def __init__(self, raw, num_envs):
+        self.raw = raw
+        self.obs = np.frombuffer(raw["obs"], np.float32).reshape(num_envs, OBS_SIZE)
+        self.actions = np.frombuffer(raw["actions"], np.uint8)
+        self.rewards = np.frombuffer(raw["rewards"], np.float32)
+        self.terminated = np.frombuffer(raw["terminated"], np.bool_)
+        self.truncated = np.frombuffer(raw["truncated"], np.bool_)
+
+
+def _run(envs, first, buffers, command, seed):
+    """Executa um comando nos ambientes [first, first + len(envs))."""
+    obs = buffers.obs
+    if command == RESET:
+        for i, env in enumerate(envs, first):
+            env.reset(None if seed is None else seed + i, out=obs[i])
+        buffers.rewards[first:first + len(envs)] = 0
+        buffers.terminated[first:first + len(envs)] = False
+        buffers.truncated[first:first + len(envs)] = False
+        return
+    actions = buffers.actions
+    rewards = buffers.rewards
+    terminated = buffers.terminated
+    truncated = buffers.truncated
+    for i, env in enumerate(envs, first):
+        row = obs[i]
+        _, rewards[i], terminated[i], truncated[i], _ = env.step(actions[i], out=row)
+        if terminated[i] or truncated[i]:
+            env.reset(out=row)
+
+
+def _worker(first, count, raw, num_envs, env_kwargs, command, seed, start, done):
+    """Laço de um processo do pool: espera um comando, roda no seu lote, avisa."""
+    try:
+        buffers = _Buffers(raw, num_envs)
+        envs = [PixelDashEnv(**env_kwargs) for _ in range(count)]
+        while True:
+            start.wait()
+            if command.value == CLOSE:
+                return
+            _run(envs, first, buffers, command.value,
+                 None if seed.value < 0 else seed.value)
+            done.wait()
+    except Exception:
+        traceback.print_exc()
+        start.abort()
+        done.abort()
+
+
+class VectorEnv:
+    """
+    num_envs PixelDashEnv em lotes sobre workers processos (0 roda tudo neste
+    processo; o padrão é um por núcleo, ou 0 com um núcleo só). obs, rewards,
+    terminated e truncated são views da memória compartilhada: copie o que
+    precisar guardar antes do próximo step().
+    """
+
+    def __init__(self, num_envs, workers=None, **env_kwargs):
+        if workers is None:
+            # Um worker sozinho é o mesmo trabalho mais a barreira
+            cores = os.cpu_count() or 1
+            workers = min(num_envs, cores) if cores > 1 else 0
+        workers = min(workers, num_envs)
+        self.num_envs = num_envs
+        self.workers = workers
+        ctx = mp.get_context()
+        self.raw = {
+            "obs": ctx.RawArray("f", num_envs * OBS_SIZE),
+            "actions": ctx.RawArray("B", num_envs),
+            "rewards": ctx.RawArray("f", num_envs),
+            "terminated": ctx.RawArray("b", num_envs),
+            "truncated": ctx.RawArray("b", num_envs),
+        }
+        self.buffers = _Buffers(self.raw, num_envs)
+        self.closed = False
+        self.processes = []
+        if not workers:
+            self.envs = [PixelDashEnv(**env_kwargs) for _ in range(num_envs)]
+            return
+
+        self.command = ctx.RawValue("i", STEP)
+        self.seed = ctx.RawValue("q", -1)
+        self.start = ctx.Barrier(workers + 1)
+        self.done = ctx.Barrier(workers + 1)
+        # Lotes contíguos, o mais iguais possível
+        bounds = [num_envs * w // workers for w in range(workers + 1)]
+        for w in range(workers):
+            process = ctx.Process(
+                target=_worker, daemon=True,
+                args=(bounds[w], bounds[w + 1] - bounds[w], self.raw, num_envs, env_kwargs,
+                      self.command, self.seed, self.start, self.done))
+            process.start()
+            self.processes.append(process)
+
+    @property
+    def obs(self):
+        return self.buffers.obs
+
+    def _send(self, command, seed=None):
+        if self.closed:
+            raise RuntimeError("VectorEnv já foi fechado")
+        if not self.workers:
+            _run(self.envs, 0, self.buffers, command, seed)
+            return
+        self.command.value = command
+        self.seed.value = -1 if seed is None else seed
+        try:
+            self.start.wait()
+            self.done.wait()
+        except threading.BrokenBarrierError:
+            self.close()
+            raise RuntimeError("um worker do VectorEnv falhou (veja o traceback acima)") from None
+
+    def reset(self, seed=None):
+        """Reinicia todos os ambientes (o i-ésimo com seed + i) e devolve as observações."""
+        self._send(RESET, seed)
+        return self.buffers.obs
+
+    def step(self, actions):
+        """
+        Um step em cada ambiente; devolve (obs, rewards, terminated, truncated).
+        Quem terminou já foi reiniciado e obs traz o começo do episódio novo.
+        """
+        buffers = self.buffers
+        buffers.actions[:] = actions
+        self._send(STEP)
+        return buffers.obs, buffers.rewards, buffers.terminated, buffers.truncated
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.processes:
+            self.command.value = CLOSE
+            try:
+                self.start.wait(timeout=5)
+            except threading.BrokenBarrierError:
+                pass
+            for process in self.processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede a vazão do VectorEnv com ações aleatórias.")
+    parser.add_argument("--envs", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--steps", type=int, default=200, help="steps do lote inteiro")
+    parser.add_argument("--frame-skip", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with VectorEnv(args.envs, args.workers, frame_skip=args.frame_skip) as env:
+        env.reset(seed=0)
+        # Direita na maior parte do tempo, para os episódios andarem pela fase
+        actions = rng.choice(len(ACTIONS), size=(args.steps, args.envs),
+                             p=[0.05, 0.05, 0.5, 0.1, 0.05, 0.25]).astype(np.uint8)
+        episodes = 0
+        start = time.perf_counter()
+        for batch in actions:
+            _, _, terminated, truncated = env.step(batch)
+            episodes += int(np.count_nonzero(terminated | truncated))
+        elapsed = time.perf_counter() - start
+    total = args.steps * args.envs
+    print(f"{total} steps em {elapsed:.2f} s: {total / elapsed:,.0f} steps/s "
+          f"({env.workers} workers, {episodes} episódios terminados)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
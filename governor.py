@@ -0,0 +1,119 @@
+"""
+Governador de qualidade: segura o frame dentro do orçamento em máquinas lentas.
+
+A cada frame jogado, frame(segundos) recebe o tempo gasto em update() e
+draw(). A cada CHECK_EVERY frames o governador olha o p90 das últimas
+WINDOW medições: acima de HIGH do orçamento, liga a próxima degradação da
+lista; abaixo de LOW, desliga a última. Depois de cada mudança espera
+COOLDOWN frames, para o efeito aparecer nas medições antes de decidir de novo.
+
+As degradações só mexem no desenho, nunca na simulação: o World continua
+determinístico, e replays e checksums não dependem da máquina. Por isso
+não há uma que simule menos os inimigos fora da tela (ver o README). Cada
+uma é consultada pelo nome com active():
+
+    animations     relógios de animação só avançam para tipos visíveis
+    hud            o placar é rasterizado de novo no máximo a cada HUD_INTERVAL frames
+                   (ver hud(); reset() o zera no começo de cada partida)
+    interpolation  desenha o último tick, sem interpolar câmera e inimigos
+    parallax       fundo parado, um blit só
+
+metrics() devolve o nível atual, o p90 e as últimas decisões, para o overlay
+do profiler (F3) ou para quem quiser registrar.
+"""
+from collections import deque
+
+import numpy as np
+
+FRAME_BUDGET = 1.0 / 60
+DEGRADATIONS = ("animations", "hud", "interpolation", "parallax")
+WINDOW = 60
+CHECK_EVERY = 10
+COOLDOWN = 60
+# Frações do orçamento que fazem o governador descer ou subir um nível
+HIGH = 0.75
+LOW = 0.4
+HUD_INTERVAL = 15
+
+
+class QualityGovernor:
+    """Liga e desliga degradações conforme o p90 recente do tempo de frame."""
+
+    def __init__(self, budget=FRAME_BUDGET, degradations=DEGRADATIONS, window=WINDOW,
+                 high=HIGH, low=LOW, cooldown=COOLDOWN):
+        self.budget = budget
+        self.degradations = tuple(degradations)
+        self.high = high
+        self.low = low
+        self.cooldown = cooldown
+        self.samples = np.zeros(window)
+        self.frames = 0
+        # Quantas degradações estão ligadas: 0 é a qualidade máxima
+        self.level = 0
+        self.active_set = frozenset()
+        self.p90 = 0.0
+        self.changed_at = 0
+        # (frame, nível antigo, nível novo, p90 em ms) das últimas mudanças
+        self.decisions = deque(maxlen=16)
+        self.frames_at = [0] * (len(self.degradations) + 1)
+        # Último valor entregue por hud() e o frame em que ele foi lido
+        self.hud_value = None
+        self.hud_frame = 0
+
+    def reset(self):
+        """Esquece as medições e o placar (ao começar uma partida), mantendo o nível."""
+        self.samples[:] = 0
+        self.frames = 0
+        self.changed_at = 0
+        self.hud_value = None
+        self.hud_frame = 0
+
+    def active(self, name):
+        return name in self.active_set
+
+    def hud(self, value):
+        """
+        O valor a mostrar no placar: com "hud" ligada, o último entregue até
+        passarem HUD_INTERVAL frames; sem ela, sempre value.
+        """
+        if (self.hud_value is None or not self.active("hud")
+                or self.frames - self.hud_frame >= HUD_INTERVAL):
+            self.hud_value = value
+            self.hud_frame = self.frames
+        return self.hud_value
+
+    def set_level(self, level):
+        level = min(max(level, 0), len(self.degradations))
+        if level != self.level:
+            self.decisions.append((self.frames, self.level, level, self.p90 * 1000.0))
+            self.level = level
+            self.active_set = frozenset(self.degradations[:level])
+            self.changed_at = self.frames
+
+    def frame(self, seconds):
+        """Registra o tempo de trabalho de um frame e, de tempos em tempos, decide."""
+        samples = self.samples
+        samples[self.frames % len(samples)] = seconds
+        self.frames += 1
+        self.frames_at[self.level] += 1
+        if self.frames % CHECK_EVERY or self.frames < len(samples):
+            return self.level
+        if self.frames - self.changed_at < self.cooldown:
+            return self.level
+        self.p90 = p90 = float(np.percentile(samples, 90))
+        if p90 > self.budget * self.high:
+            self.set_level(self.level + 1)
+        elif p90 < self.budget * self.low:
+            self.set_level(self.level - 1)
+        return self.level
+
+    def metrics(self):
+        """Nível, degradações ligadas, p90 (ms), orçamento (ms), frames por nível e decisões."""
+        return {
+            "level": self.level,
+            "active": [name for name in self.degradations if name in self.active_set],
+            "p90_ms": self.p90 * 1000.0,
+            "budget_ms": self.budget * 1000.0,
+            "frames_at": list(self.frames_at),
+            "decisions": list(self.decisions),
+        }
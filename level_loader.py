@@ -0,0 +1,260 @@
+"""
+Fases em arquivo: formato declarativo em JSON e compilador com cache binário.
+
+O JSON descreve blocos, espinhos, moedas, inimigos e a bandeira. O compilador
+resolve tudo para posições absolutas em arrays NumPy compactos, gravados em
+levels/.cache/<hash>.npz; o hash cobre o conteúdo do arquivo, a versão do
+formato e o tamanho dos sprites, então o cache é reaproveitado entre
+execuções até algo mudar. O World recria o estado da partida direto desses
+arrays, sem rodar o código de montagem da fase de novo.
+
+Coordenadas no JSON: "x" é o centro; a altura vem como "y" (absoluto na
+tela), "dy" (relativo ao topo do chão) ou, para espinhos, "on" (altura da
+superfície em que o espinho está apoiado, relativa ao topo do chão).
+Entradas com "count" viram uma fileira, andando "step" px (ou "width",
+a largura do sprite) a cada item. "checkpoints" lista os x em que o player,
+ao pisar no chão, passa a renascer depois de morrer. "music", opcional, é o
+nome da música da fase em music/ (sem ela, toca a música padrão).
+"""
+import hashlib
+import json
+import os
+import zipfile
+
+import numpy as np
+
+from entities import IMAGES_DIR, ground_top_y, sprite_size
+from settings import HEIGHT
+
+FORMAT_VERSION = 1
+LEVELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels")
+CACHE_DIR = os.path.join(LEVELS_DIR, ".cache")
+DEFAULT_LEVEL = os.path.join(LEVELS_DIR, "level_1.json")
+
+# Campos compilados de cada tipo de inimigo, além de x e y
+ENEMY_FIELDS = {
+    "walkers": ("patrol_left", "patrol_right", "dir"),
+    "flyers": ("patrol_left", "patrol_right", "dir", "speed"),
+    "jumpers": ("y_start",),
+    "swoopers": ("speed", "dir", "x_start", "y_start", "amplitude", "frequency"),
+}
+
+_loaded = {}
+
+
+class LevelError(ValueError):
+    """Arquivo de fase inválido."""
+
+
+class LevelData:
+    """Uma fase compilada: arrays prontos para o World instanciar."""
+
+    def __init__(self, digest, arrays):
+        self.digest = digest
+        self.arrays = arrays
+        meta = json.loads(str(arrays["meta"]))
+        self.name = meta["name"]
+        self.length = meta["length"]
+        self.start = tuple(meta["start"])
+        self.flag = tuple(meta["flag"])
+        self.checkpoints = tuple(meta.get("checkpoints", ()))
+        self.music = meta.get("music")
+        self.images = tuple(str(name) for name in arrays["images"])
+        self._by_x = {}
+
+    @property
+    def telemetry_key(self):
+        """Nome do arquivo de telemetria da fase: o hash dela."""
+        return self.digest
+
+    @property
+    def total_coins(self):
+        return len(self.arrays["coins_x"])
+
+    def table(self, group):
+        """Arrays de um grupo ("blocks", "coins", "walkers"...) por campo."""
+        prefix = group + "_"
+        return {key[len(prefix):]: value for key, value in self.arrays.items()
+                if key.startswith(prefix)}
+
+    def rows_in(self, group, lo, hi):
+        """
+        Linhas do grupo com x em [lo, hi), na ordem do arquivo, mais a
+        coluna "uid" (o índice da linha na fase). É por aqui que o streaming
+        carrega um trecho da fase sem percorrer o resto.
+        """
+        index = self._by_x.get(group)
+        if index is None:
+            xs = self.arrays[group + "_x"]
+            order = np.argsort(xs, kind="stable")
+            index = self._by_x[group] = (xs[order], order)
+        xs, order = index
+        uids = np.sort(order[np.searchsorted(xs, lo):np.searchsorted(xs, hi)])
+        rows = {name: values[uids] for name, values in self.table(group).items()}
+        rows["uid"] = uids
+        return rows
+
+    def uid_floor(self, camera_x):
+        """Uids abaixo deste já não existem na fase; numa fase fixa, nenhum."""
+        return 0
+
+    def coin(self, uid):
+        """(x, y) da moeda uid."""
+        arrays = self.arrays
+        return float(arrays["coins_x"][uid]), float(arrays["coins_y"][uid])
+
+    def sprites_in(self, lo, hi):
+        """(imagem, x, y) dos blocos e espinhos com x em [lo, hi)."""
+        images = self.images
+        rows = self.rows_in("blocks", lo, hi)
+        for image_id, x, y in zip(rows["image"].tolist(), rows["x"].tolist(), rows["y"].tolist()):
+            yield images[image_id], x, y
+        rows = self.rows_in("spikes", lo, hi)
+        for x, y in zip(rows["x"].tolist(), rows["y"].tolist()):
+            yield "enemy_spike", x, y
+
+
+def _sprites_digest():
+    sizes = sorted((name, sprite_size(name[:-4])) for name in os.listdir(IMAGES_DIR)
+                   if name.endswith(".png"))
+    return repr(sizes).encode()
+
+
+def _height(entry, ground_y, where):
+    if "y" in entry:
+        return float(entry["y"])
+    if "dy" in entry:
+        return float(ground_y + entry["dy"])
+    raise LevelError(f"{where}: falta 'y' ou 'dy'")
+
+
+def _expand(entries, image_of=None):
+    """Abre as fileiras ("count"/"step") em entradas individuais."""
+    for entry in entries:
+        count = entry.get("count", 1)
+        step = entry.get("step", 0)
+        if step == "width":
+            step = sprite_size(image_of(entry))[0]
+        for i in range(count):
+            yield entry, entry["x"] + i * step
+
+
+def compile_level(spec):
+    """Resolve o dicionário de uma fase em arrays NumPy."""
+    ground_y = ground_top_y()
+    arrays = {}
+
+    images = []
+    image_ids = []
+    block_x = []
+    block_y = []
+    for entry, x in _expand(spec["blocks"], lambda e: e["image"]):
+        image = entry["image"]
+        if image not in images:
+            images.append(image)
+        image_ids.append(images.index(image))
+        block_x.append(x)
+        block_y.append(_height(entry, ground_y, f"bloco em x={x}"))
+    if not block_x:
+        raise LevelError("a fase precisa de pelo menos um bloco")
+    arrays["blocks_image"] = np.array(image_ids, np.uint16)
+    arrays["blocks_x"] = np.array(block_x, np.float64)
+    arrays["blocks_y"] = np.array(block_y, np.float64)
+    arrays["images"] = np.array(images)
+
+    spike_height = sprite_size("enemy_spike")[1]
+    spikes = spec.get("spikes", [])
+    arrays["spikes_x"] = np.array([s["x"] for s in spikes], np.float64)
+    arrays["spikes_y"] = np.array([ground_y + s.get("on", 0) - spike_height / 2 for s in spikes],
+                                  np.float64)
+
+    coins = list(_expand(spec.get("coins", [])))
+    arrays["coins_x"] = np.array([x for _, x in coins], np.float64)
+    arrays["coins_y"] = np.array([_height(e, ground_y, f"moeda em x={x}") for e, x in coins],
+                                 np.float64)
+
+    enemies = spec.get("enemies", {})
+    unknown = set(enemies) - set(ENEMY_FIELDS)
+    if unknown:
+        raise LevelError(f"tipos de inimigo desconhecidos: {sorted(unknown)}")
+    for kind, fields in ENEMY_FIELDS.items():
+        columns = {name: [] for name in ("x", "y") + fields}
+        for entry in enemies.get(kind, []):
+            x = float(entry["x"])
+            y = _height(entry, ground_y, f"{kind} em x={x}")
+            patrol = entry.get("patrol", (x, x))
+            values = {"x": x, "y": y, "patrol_left": patrol[0], "patrol_right": patrol[1],
+                      "dir": entry.get("dir", 1), "speed": entry.get("speed", 0),
+                      "x_start": x, "y_start": y, "amplitude": entry.get("amplitude", 0),
+                      "frequency": entry.get("frequency", 0)}
+            for name, column in columns.items():
+                column.append(values[name])
+        for name, column in columns.items():
+            arrays[f"{kind}_{name}"] = np.array(column, np.float64)
+
+    # A bandeira fica apoiada em cima do bloco indicado
+    block = spec.get("flag", {}).get("block", -1)
+    block_image = images[image_ids[block]]
+    flag_height = sprite_size("flag_1")[1]
+    flag_y = block_y[block] - sprite_size(block_image)[1] / 2 - flag_height / 2
+
+    meta = {
+        "name": spec.get("name", ""),
+        "length": spec["length"],
+        "start": spec.get("start", [150, HEIGHT - 100]),
+        "flag": [block_x[block], flag_y],
+        "checkpoints": sorted(float(x) for x in spec.get("checkpoints", [])),
+        "music": spec.get("music"),
+    }
+    arrays["meta"] = np.array(json.dumps(meta))
+    return arrays
+
+
+def level_digest(raw):
+    h = hashlib.sha1()
+    h.update(b"pixel-dash-level-%d\0" % FORMAT_VERSION)
+    h.update(_sprites_digest())
+    h.update(raw)
+    return h.hexdigest()
+
+
+def level_from_spec(spec):
+    """Compila uma fase montada em código, sem arquivo nem cache em disco."""
+    raw = json.dumps(spec, sort_keys=True).encode()
+    return LevelData(level_digest(raw), compile_level(spec))
+
+
+def load_level(path=DEFAULT_LEVEL):
+    """
+    Carrega uma fase, usando o cache compilado quando o hash bate.
+    Fases já carregadas neste processo ficam em memória.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    digest = level_digest(raw)
+    level = _loaded.get(digest)
+    if level is not None:
+        return level
+
+    cache_path = os.path.join(CACHE_DIR, digest + ".npz")
+    try:
+        with np.load(cache_path) as cached:
+            arrays = {key: cached[key] for key in cached.files}
+    except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+        # Sem cache, ou um cache truncado ou corrompido: compila de novo
+        try:
+            spec = json.loads(raw)
+        except ValueError as e:
+            raise LevelError(f"{path}: {e}") from None
+        arrays = compile_level(spec)
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            # Grava com nome temporário para outro processo nunca ler pela metade
+            tmp_path = cache_path + ".tmp.npz"
+            np.savez(tmp_path, **arrays)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            print("WARNING: could not write level cache.")
+
+    level = _loaded[digest] = LevelData(digest, arrays)
+    return level
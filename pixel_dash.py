@@ -1,60 +1,97 @@
 import pgzrun
+import os
 import random
-import math
+import time
+import pygame
 from pygame import Rect
 
+from atlas import Atlas
+from audio import SoundQueue
+from campaign import Campaign, Stage
+from culling import CULL_MARGIN
+from static_layer import StaticLayer
+from settings import WIDTH, HEIGHT
+from entities import ground_top_y
+from governor import QualityGovernor
+from level_loader import load_level
+from preload import Preloader, warm_music
+from procgen import EndlessLevel
+from profiler import Profiler
+from replay import Recording, ReplayFeed, check_level, level_for, state_checksum
+from telemetry import END, OUTCOME_IDS, PRESS, START, Telemetry
+from text_cache import TextCache
+from timestep import FixedTimestep
+from world import World, Inputs
+
 # Configurações
-WIDTH = 800
-HEIGHT = 600
 TITLE = "Pixel Dash"
 
-# Física e Gameplay
-GRAVITY = 0.6
-PLAYER_SPEED = 4
-JUMP_POWER = 12
-LEVEL_LENGTH = 8000
-TOTAL_COINS = 30
-
 # Variáveis Globais
 game_state = "tutorial"
-camera_x = 0
 music_on = True
 sounds_on = True
-score = 0
-all_coins_collected = False
-coins = []
-level_blocks = []
-coin_animation_timer = 0
-
-# Listas de inimigos
-enemies = {
-    "walkers": [],
-    "flyers": [],
-    "jumpers": [],
-    "swoopers": [],
-    "spikes": []
-}
-
-# Player
-player = Actor("hero_idle_1", (150, 300))
-player.vy = 0 
-player.on_ground = False
-player.jumps_left = 2 
-
-# Sprites
-player_frames = {
-    "idle": ["hero_idle_1", "hero_idle_2"],
-    "run": ["hero_idle_1", "hero_idle_2"],
-    "jump": ["hero_idle_1"]
-}
-player.animation_timer = 0
-player.frame_idx = 0
-
-# Bandeira
-flag_actor = Actor("flag_1", (LEVEL_LENGTH - 300, 0))
-flag_frames = ["flag_1", "flag_2"]
-flag_timer = 0
-flag_frame_idx = 0
+jump_presses = 0
+
+# Toda a simulação fica no World; update() e draw() só adaptam o pgzero a ele.
+# Para a tela de tutorial aparecer logo, World, atlas e camada estática só são
+# montados ao sair dela; enquanto isso o Preloader lê a fase e aquece sons e
+# música numa thread.
+profiler = Profiler()
+preloader = Preloader(profiler.milestone)
+# Efeitos sonoros do World: enfileirados durante o tick e tocados uma vez por frame
+sound_queue = SoundQueue(sounds)
+preloader.warm_audio(sound_queue)
+world = None
+timestep = None
+atlas = None
+animations = {}
+static_layer = None
+# Campanha (Start Game): cada fase tem World e camada estática próprios, num
+# Stage; a próxima é montada no worker do Preloader enquanto a atual é jogada
+campaign = None
+stage = None
+# World e camada estática avulsos, para o modo infinito e os replays
+free_world = None
+free_layer = None
+DEFAULT_MUSIC = "background_music"
+first_frame = True
+# Com PIXEL_DASH_REPLAY=arquivo.pxr o jogo abre direto no replay da partida
+# gravada, com o mesmo SIM_HZ e streaming da gravação
+REPLAY_PATH = os.environ.get("PIXEL_DASH_REPLAY")
+replay_feed = ReplayFeed(Recording.load(REPLAY_PATH)) if REPLAY_PATH else None
+# Inputs da partida atual, tick a tick; F5 salva em arquivo
+recording = None
+# Eventos das partidas em telemetry/ (python telemetry.py mostra os mapas de
+# calor); PIXEL_DASH_TELEMETRY=0 desliga. Replays não são registrados.
+telemetry = Telemetry()
+TELEMETRY_ON = os.environ.get("PIXEL_DASH_TELEMETRY", "1") != "0"
+# Mede update() + draw() de cada frame jogado e, se passar do orçamento,
+# troca qualidade de desenho (animações, placar, interpolação, parallax)
+# por tempo; a simulação não muda
+governor = QualityGovernor()
+frame_start = None
+DYNAMIC_KINDS = ("coins", "flag")
+PROFILE_REFRESH = 30
+profile_lines = []
+text_cache = TextCache()
+
+# Telas paradas (tutorial, menu, fim de jogo) só são repintadas quando algo
+# muda, e o loop cai para IDLE_FPS enquanto nada anima
+IDLE_FPS = 10
+IDLE_REPAINT = 2.0
+IDLE_WAKE_EVENTS = (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.QUIT)
+screen_dirty = True
+dirty_rects = []
+painted_state = None
+last_paint = 0.0
+last_idle_tick = 0.0
+was_idle = False
+
+# Procurada uma vez só; sem a imagem, o fundo é uma cor sólida
+try:
+    background = images.background_game
+except (KeyError, AttributeError):
+    background = None
 
 # Interface
 class Button:
@@ -62,20 +99,30 @@ class Button:
         self.rect = rect
         self.text = text
         self.action = action
-        self.image = images.botao
-        self.scaled_image = images.botao
+
+    @property
+    def image(self):
+        # O atlas só é montado quando o menu aparece pela primeira vez
+        return load_atlas().frame("botao")
+
+    scaled_image = image
+
+    def bounds(self):
+        """Área que o botão ocupa na tela (a imagem passa um pouco do rect)."""
+        return self.scaled_image.get_rect(center=self.rect.center).union(self.rect)
 
     def draw(self):
         img_rect = self.scaled_image.get_rect(center=self.rect.center)
         screen.surface.blit(self.scaled_image, img_rect.topleft)
-        screen.draw.text(self.text, center=self.rect.center, color="black",
-                         fontname="vcr_osd_mono", fontsize=40)
+        draw_text(self.text, 40, "black", center=self.rect.center)
 
     def is_clicked(self, pos):
         return self.rect.collidepoint(pos)
 
 start_button = Button(Rect(0, 0, 220, 50), "Start Game", "start")
 start_button.rect.center = (WIDTH // 2, HEIGHT // 2 - 100)
+endless_button = Button(Rect(0, 0, 220, 50), "Endless", "endless")
+endless_button.rect.center = (WIDTH // 2, HEIGHT // 2 - 50)
 quit_button = Button(Rect(0, 0, 220, 50), "Quit", "quit")
 quit_button.rect.center = (WIDTH // 2, HEIGHT // 2 + 100)
 music_button = Button(Rect(0, 0, 220, 50), "Music: ON", "music_toggle")
@@ -84,11 +131,11 @@ sounds_button = Button(Rect(0, 0, 220, 50), "Sounds: ON", "sounds_toggle")
 sounds_button.rect.center = (WIDTH // 2, HEIGHT // 2 + 50)
 
 def play_background_music():
-    # Toca música 
+    # Toca música da fase, ou a padrão
     global music_on
     if music_on:
         try:
-            music.play("background_music")
+            music.play((world and world.level.music) or DEFAULT_MUSIC)
             music.set_volume(0.04)
         except AttributeError:
             print("WARNING: Background music file not found.")
@@ -97,422 +144,395 @@ def stop_background_music():
     global music_on
     music.stop()
 
-def reset_game():
-    global player, camera_x, score, all_coins_collected, coin_animation_timer
-    score = 0
-    player.image = "hero_idle_1"
-    player.pos = (150, HEIGHT - 100)
-    player.vy = 0
-    player.on_ground = True
-    player.jumps_left = 2
-    camera_x = 0
-    all_coins_collected = False
-    coin_animation_timer = 0
-    
-    # Recria o nível do zero
-    create_level_blocks()
-    spawn_enemies()
-    create_level_coins()
-
-
-# LEVEL CREATION FUNCTIONS
-def ground_top_y():
-    """Calculates the Y position of the top of the ground sprite."""
-    return HEIGHT - images.ground.get_height()
-
-def create_level_coins():
-    """Posiciona as moedas."""
-    global coins
-    coins.clear()
-    ground_y = ground_top_y()
-    
-    # Adicionando moedas por seções, elas não são geradas de modo aleatório
-    coins.extend([
-        Actor("coin_1", (400, ground_y - 120)), Actor("coin_1", (600, ground_y - 200)),
-        Actor("coin_1", (1300, ground_y - 120)), Actor("coin_1", (1550, ground_y - 200)),
-        Actor("coin_1", (1800, ground_y - 270)), Actor("coin_1", (2500, ground_y - 200)),
-        Actor("coin_1", (2800, ground_y - 250)), Actor("coin_1", (3100, ground_y - 200)),
-        Actor("coin_1", (4750, ground_y - 150)), Actor("coin_1", (4900, ground_y - 200)),
-        Actor("coin_1", (5050, ground_y - 250)), Actor("coin_1", (5800, ground_y - 200)),
-        Actor("coin_1", (6000, ground_y - 250)), Actor("coin_1", (6200, ground_y - 300)),
-        Actor("coin_1", (6800, ground_y - 120)), Actor("coin_1", (7000, ground_y - 200)),
-        Actor("coin_1", (7200, ground_y - 280))
-    ])
-    
-    for i in range(8):
-        coins.append(Actor("coin_1", (3600 + i * 100, ground_y - 150)))
-    for i in range(5):
-        coins.append(Actor("coin_1", (7500 + i * 100, ground_y - 120)))
-
-def create_level_blocks():
-    """
-    Define posições de blocos e espinhos.
-    Layout manual para garantir pulos possíveis.
-    """
-    global level_blocks, enemies, flag_actor
-    level_blocks.clear()
-    enemies["spikes"].clear()
-    
-    ground_y = ground_top_y()
-    spike_height = images.enemy_spike.get_height()
-    
-
-    block_x = 400
-    ground_width = images.ground.get_width()
-    for i in range(5):
-        level_blocks.append(Actor("ground", (block_x + i * ground_width, ground_y)))
-    enemies["spikes"].append(Actor("enemy_spike", (block_x + 3 * ground_width, ground_y - spike_height / 2)))
-    level_blocks.append(Actor("platform_small", (block_x + 6 * ground_width, ground_y - 50)))
-
-
-    climb_x = 1200
-    level_blocks.extend([
-        Actor("platform_large", (climb_x, ground_y - 100)),
-        Actor("platform_medium", (climb_x + 250, ground_y - 180)),
-        Actor("platform_small", (climb_x + 500, ground_y - 250)),
-        Actor("platform_medium", (climb_x + 700, ground_y - 200))
-    ])
-    enemies["spikes"].append(Actor("enemy_spike", (climb_x + 250, ground_y - 180 - spike_height / 2)))
-
-
-    abyss_y = ground_y - 150
-    level_blocks.extend([
-        Actor("platform_small", (2400, abyss_y)),
-        Actor("platform_small", (2700, abyss_y + 50)),
-        Actor("platform_small", (3000, abyss_y)),
-        Actor("platform_medium", (3300, abyss_y - 50))
-    ])
-
-
-    bridge_x = 3600
-    bridge_y = ground_y - 100
-    for i in range(8):
-        platform_type = "platform_medium" if i % 2 == 0 else "platform_large"
-        level_blocks.append(Actor(platform_type, (bridge_x + i * 100, bridge_y)))
-    enemies["spikes"].extend([
-        Actor("enemy_spike", (bridge_x + 250, ground_y - spike_height / 2)),
-        Actor("enemy_spike", (bridge_x + 650, ground_y - spike_height / 2))
-    ])
-
-
-    elevate_x = 5600
-    level_blocks.extend([
-        Actor("platform_large", (elevate_x, ground_y - 150)),
-        Actor("platform_small", (elevate_x + 400, ground_y - 200)),
-        Actor("platform_medium", (elevate_x + 700, ground_y - 250))
-    ])
-    enemies["spikes"].append(Actor("enemy_spike", (elevate_x + 100, ground_y - spike_height / 2)))
-
-
-    final_x = 7000
-    level_blocks.extend([
-        Actor("platform_small", (final_x - 300, ground_y - 100)),
-        Actor("platform_small", (final_x - 150, ground_y - 180)),
-        Actor("platform_medium", (final_x + 50, ground_y - 250))
-    ])
-    enemies["spikes"].extend([
-        Actor("enemy_spike", (final_x + 250, ground_y - spike_height / 2)),
-        Actor("enemy_spike", (final_x + 350, ground_y - spike_height / 2)),
-        Actor("enemy_spike", (final_x + 450, ground_y - spike_height / 2))
-    ])
-
-    for i in range(5):
-        level_blocks.append(Actor("ground", (final_x + 550 + i * images.ground.get_width(), ground_y)))
-    final_block = Actor("ground", (LEVEL_LENGTH, ground_y))
-    level_blocks.append(final_block)
-    flag_actor.pos = (final_block.x, final_block.y - final_block.height / 2 - flag_actor.height / 2)
-
-def spawn_enemies():
-    """Cria e posiciona os inimigos."""
-    global enemies
-    enemies["walkers"].clear(); enemies["flyers"].clear(); enemies["jumpers"].clear(); enemies["swoopers"].clear()
-
-    enemies["walkers"].extend([
-        {"actor": Actor("enemy_walk_1", (700, ground_top_y() - 20)), "left": 600, "right": 800, "dir": 1, "frames": ["enemy_walk_1", "enemy_walk_2"], "frame_idx": 0, "timer": 0},
-        {"actor": Actor("enemy_walk_1", (2600, ground_top_y() - 20)), "left": 2500, "right": 2700, "dir": -1, "frames": ["enemy_walk_1", "enemy_walk_2"], "frame_idx": 0, "timer": 0},
-        {"actor": Actor("enemy_walk_1", (4000, ground_top_y() - 200)), "left": 3800, "right": 4200, "dir": 1, "frames": ["enemy_walk_1", "enemy_walk_2"], "frame_idx": 0, "timer": 0},
-        {"actor": Actor("enemy_walk_1", (6800, ground_top_y() - 20)), "left": 6600, "right": 7000, "dir": -1, "frames": ["enemy_walk_1", "enemy_walk_2"], "frame_idx": 0, "timer": 0}
-    ])
-    enemies["flyers"].extend([
-        {"actor": Actor("enemy_fly_1", (1600, HEIGHT - 180)), "left": 1400, "right": 1800, "dir": 1, "frames": ["enemy_fly_1", "enemy_fly_2", "enemy_fly_3"], "frame_idx": 0, "timer": 0, "speed": 2},
-        {"actor": Actor("enemy_fly_1", (3200, HEIGHT - 120)), "left": 3000, "right": 3400, "dir": -1, "frames": ["enemy_fly_1", "enemy_fly_2", "enemy_fly_3"], "frame_idx": 0, "timer": 0, "speed": 1.5},
-        {"actor": Actor("enemy_fly_1", (5200, HEIGHT - 200)), "left": 5000, "right": 5400, "dir": 1, "frames": ["enemy_fly_1", "enemy_fly_2", "enemy_fly_3"], "frame_idx": 0, "timer": 0, "speed": 2.5}
-    ])
-    enemies["jumpers"].extend([
-        {"actor": Actor("enemy_jump", (1000, ground_top_y() - 25)), "jump_timer": 0, "jump_delay": 0, "jump_count": 0, "pause_timer": 0, "y_start": ground_top_y() - 25, "jumping": False, "fall_speed": 0},
-        {"actor": Actor("enemy_jump", (4400, ground_top_y() - 25)), "jump_timer": 20, "jump_delay": 0, "jump_count": 0, "pause_timer": 0, "y_start": ground_top_y() - 25, "jumping": False, "fall_speed": 0},
-        {"actor": Actor("enemy_jump", (6200, ground_top_y() - 25)), "jump_timer": 60, "jump_delay": 0, "jump_count": 0, "pause_timer": 0, "y_start": ground_top_y() - 25, "jumping": False, "fall_speed": 0}
-    ])
-    enemies["swoopers"].extend([
-        {"actor": Actor("enemy_swoop_1", (2000, HEIGHT - 300)), "speed": 2.5, "dir": 1, "frames": ["enemy_swoop_1", "enemy_swoop_2", "enemy_swoop_3"], "frame_idx": 0, "anim_timer": 0, "x_start": 2000, "y_start": HEIGHT - 300, "amplitude": 120, "frequency": 0.05},
-        {"actor": Actor("enemy_swoop_1", (5800, HEIGHT - 250)), "speed": 2, "dir": -1, "frames": ["enemy_swoop_1", "enemy_swoop_2", "enemy_swoop_3"], "frame_idx": 0, "anim_timer": 0, "x_start": 5800, "y_start": HEIGHT - 250, "amplitude": 80, "frequency": 0.04}
-    ])
+def load_atlas():
+    """Todos os sprites vêm do atlas; o loader do pgzero só é usado para sons e música."""
+    global atlas
+    if atlas is None:
+        atlas = Atlas()
+        profiler.milestone("atlas")
+    return atlas
+
+
+def use_world(new_world, layer):
+    """Passa a simular e desenhar new_world, com a camada estática dele."""
+    global world, static_layer, timestep, animations
+    world = new_world
+    static_layer = layer
+    if timestep is None or timestep.step != 1.0 / world.sim_hz:
+        timestep = FixedTimestep(world.sim_hz)
+    if not animations:
+        frames = load_atlas()
+        animations = {kind: frames.animation(names) for kind, names in world.animation_frames.items()}
+
+
+def load_content():
+    """Passa a usar o World avulso, montando-o (e a camada estática dele) na primeira vez."""
+    global free_world, free_layer, stage
+    stage = None
+    if free_world is None:
+        level = preloader.level()
+        if replay_feed:
+            free_world = World(level, streaming=replay_feed.recording.streaming,
+                               sim_hz=replay_feed.recording.sim_hz, profiler=profiler, telemetry=telemetry)
+        else:
+            free_world = World(level, profiler=profiler, telemetry=telemetry)
+        free_layer = StaticLayer(load_atlas().frame, WIDTH, HEIGHT, ground_top_y())
+        profiler.milestone("content")
+    use_world(free_world, free_layer)
+
+
+def build_stage(index, path):
+    """Monta uma fase da campanha; roda no worker do Preloader."""
+    level = load_level(path)
+    stage_world = World(level, profiler=profiler, telemetry=telemetry)
+    layer = StaticLayer(atlas.frame, WIDTH, HEIGHT, ground_top_y())
+    layer.build(level.sprites_in, stage_world.camera_x)
+    layer.level = level
+    warm_music(level.music or DEFAULT_MUSIC)
+    return Stage(index, level, stage_world, layer)
+
+
+def prepare_campaign():
+    """Cria a campanha e já manda montar a primeira fase enquanto o menu está na tela."""
+    global campaign
+    if campaign is None:
+        # O atlas é montado aqui, na thread principal, antes de o worker usá-lo
+        load_atlas()
+        campaign = Campaign(build_stage, preloader.executor)
+    campaign.prefetch(0)
+
+
+def play_stage(index):
+    """Começa uma partida na fase index da campanha e pede a montagem da seguinte."""
+    global stage, game_state
+    prepare_campaign()
+    stage = campaign.enter(index)
+    use_world(stage.world, stage.static_layer)
+    if stage.fresh:
+        # A montagem já deixou o World no começo da fase, com os atores no lugar
+        stage.fresh = False
+        begin_run()
+    else:
+        reset_game()
+    campaign.prefetch(index + 1)
+    game_state = "playing"
+    play_background_music()
+
+
+def reset_game(seed=None, level=None):
+    """Começa uma partida no World atual, em level ou, se não vier, na fase dele."""
+    if level is not None and world.level is not level:
+        world.load_level(level)
+    world.reset(seed)
+    begin_run()
+
+
+def begin_run():
+    """Prepara relógio, governador, gravação e telemetria para a partida que o World começou."""
+    global jump_presses, recording
+    jump_presses = 0
+    timestep.reset()
+    governor.reset()
+    recording = Recording.of(world)
+    if TELEMETRY_ON and not replay_feed:
+        telemetry.begin(world.level.telemetry_key, world.seed)
+        telemetry.record(START, 0, world.player.x, world.player.y)
+    else:
+        telemetry.end()
+    # Chão, blocos e espinhos só são assados de novo quando a fase muda
+    if static_layer.level is not world.level:
+        static_layer.build(world.level.sprites_in, world.camera_x)
+        static_layer.level = world.level
 
 
 # --- Lógica do Jogo ---
-def update():
-    global game_state, camera_x, all_coins_collected, score
-    
+def update(dt):
+    global game_state, jump_presses, was_idle, frame_start
+
     if game_state != "playing":
+        idle_wait()
+        was_idle = True
         return
+    frame_start = time.perf_counter()
+    if was_idle:
+        # O dt deste frame inclui a espera da tela parada; não é tempo de jogo
+        was_idle = False
+        dt = 0
+
+    # No modo infinito, gera a fase à frente da câmera dentro de um orçamento fixo
+    if isinstance(world.level, EndlessLevel):
+        world.level.advance(world.camera_x)
+
+    # Quantos ticks fixos cabem no tempo que passou; pode ser zero em telas rápidas
+    for _ in range(timestep.advance(dt)):
+        profiler.start()
+        if replay_feed:
+            if replay_feed.done:
+                finish_replay()
+                break
+            inputs = replay_feed.next()
+            if inputs is None:
+                respawn()
+                continue
+        else:
+            inputs = Inputs(keyboard.a or keyboard.left, keyboard.d or keyboard.right, jump_presses)
+        jump_presses = 0
+        recording.record(inputs)
+        events = world.step(inputs)
+
+        if world.state != "playing":
+            recording.finish(world)
+            telemetry.record(END, world.tick, world.player.x, world.player.y,
+                             subject=OUTCOME_IDS[world.state])
+            # No replay, o tick seguinte a uma morte é o respawn gravado: não passa pela tela
+            if not (replay_feed and not replay_feed.done):
+                game_state = world.state
+                stop_background_music()
+                if replay_feed:
+                    finish_replay()
+        for name in events:
+            sound_queue.push(name)
+        if game_state != "playing":
+            break
+
+    # Os sons de todos os ticks deste frame saem juntos, sem repetições
+    sound_queue.flush()
+
+
+def respawn():
+    """Volta ao último checkpoint restaurando o snapshot, sem remontar a fase."""
+    global game_state, jump_presses
+    jump_presses = 0
+    world.respawn()
+    timestep.reset()
+    recording.record_respawn()
+    if game_state != "playing":
+        game_state = "playing"
+        play_background_music()
 
-    # Movimento do personagem
-    moving = False
-    if keyboard.a or keyboard.left:
-        player.x -= PLAYER_SPEED
-        moving = True
-    if keyboard.d or keyboard.right:
-        player.x += PLAYER_SPEED
-        moving = True
-        
-    player.vy += GRAVITY
-    player.y += player.vy
-    
-    top_y = ground_top_y()
-    if player.bottom >= top_y:
-        player.bottom = top_y
-        player.vy = 0
-        player.on_ground = True
-        player.jumps_left = 2
-    
-    check_collisions()
-    update_all_enemies()
-    animate_coins()
-
-    player.animation_timer = (player.animation_timer + 1) % 10
-    if player.on_ground:
-        player.image = player_frames["run"][player.animation_timer % len(player_frames["run"])] if moving else player_frames["idle"][player.animation_timer % len(player_frames["idle"])]
-    else:
-        player.image = player_frames["jump"][0]
-        
-    camera_x = max(0, player.x - WIDTH * 0.4)
 
-    if hit_any_lethal_enemy():
-        game_state = "game_over"
-        stop_background_music()
-        if sounds_on:
-            try:
-                sounds.game_over.set_volume(0.2)
-                sounds.game_over.play()
-            except AttributeError:
-                print("WARNING: 'game_over.wav' sound file not found!")
-
-    if player.x >= LEVEL_LENGTH and game_state == "playing":
-        all_coins_collected = (score == TOTAL_COINS)
-        game_state = "complete"
+def start_replay():
+    """Começa a partida gravada em REPLAY_PATH, na semente dela."""
+    global game_state
+    load_content()
+    recording = replay_feed.recording
+    level = level_for(recording, world.level)
+    check_level(recording, level)
+    reset_game(recording.seed, level)
+    game_state = "playing"
+
+
+def finish_replay():
+    """Confere o estado final do replay com o checksum gravado e volta ao jogo normal."""
+    global game_state, replay_feed
+    expected = replay_feed.recording.checksum
+    if expected is None:
+        print(f"Replay terminou em {world.tick} ticks (sem checksum gravado)")
+    elif state_checksum(world) == expected:
+        print(f"Replay terminou em {world.tick} ticks; checksum ok")
+    else:
+        print(f"Replay terminou em {world.tick} ticks; DIVERGÊNCIA do checksum gravado")
+    replay_feed = None
+    if game_state == "playing":
+        game_state = "menu"
         stop_background_music()
-        if sounds_on:
-            try:
-                sounds.victory.set_volume(0.2)
-                sounds.victory.play()
-            except AttributeError:
-                print("WARNING: 'victory.wav' sound file not found!")
-
-def check_collisions():
-    """Verifica colisões com blocos, inimigos e moedas."""
-    global score, player
-    
-    for block in level_blocks:
-        if player.colliderect(block):
-            if player.vy >= 0 and player.bottom <= block.y + 10:
-                player.bottom = block.top
-                player.vy = 0
-                player.on_ground = True
-                player.jumps_left = 2
-            elif player.vy < 0 and player.top >= block.bottom - 10:
-                player.top = block.bottom
-                player.vy = 0
-    
-    for enemy_list in [enemies['walkers'], enemies['flyers'], enemies['jumpers'], enemies['swoopers']]:
-        for enemy_data in list(enemy_list):
-            enemy_actor = enemy_data["actor"]
-            if player.colliderect(enemy_actor):
-                if player.vy > 0 and player.bottom <= enemy_actor.y + 10:
-                    enemy_list.remove(enemy_data)
-                    player.vy = -JUMP_POWER * 0.7
-                    if sounds_on:
-                        try:
-                            sounds.squish.set_volume(0.2)
-                            sounds.squish.play()
-                        except AttributeError:
-                            print("WARNING: 'squish.wav' sound file not found!")
-
-    for coin in list(coins):
-        if player.colliderect(coin):
-            coins.remove(coin)
-            score += 1
-            if sounds_on:
-                try:
-                    sounds.coin_sound.set_volume(0.2)
-                    sounds.coin_sound.play()
-                except AttributeError:
-                    print("WARNING: 'coin_sound.wav' sound file not found!")
-
-def update_all_enemies():
-    global flag_timer, flag_frame_idx, enemies
-    
-    # Atualiza os inimigos
-    for w in enemies["walkers"]:
-        w["actor"].x += w["dir"] * 1.4
-        if w["actor"].x < w["left"] or w["actor"].x > w["right"]:
-            w["dir"] *= -1
-        w["timer"] = (w["timer"] + 1) % 10
-        if w["timer"] == 0:
-            w["frame_idx"] = (w["frame_idx"] + 1) % len(w["frames"])
-            w["actor"].image = w["frames"][w["frame_idx"]]
-    
-
-    for f in enemies["flyers"]:
-        f["actor"].x += f["dir"] * f["speed"]
-        if f["actor"].x < f["left"] or f["actor"].x > f["right"]:
-            f["dir"] *= -1
-        f["timer"] = (f["timer"] + 1) % 8
-        if f["timer"] == 0:
-            f["frame_idx"] = (f["frame_idx"] + 1) % len(f["frames"])
-            f["actor"].image = f["frames"][f["frame_idx"]]
-    
-
-    for j in enemies["jumpers"]:
-        actor = j["actor"]
-        if j["pause_timer"] > 0:
-            j["pause_timer"] -= 1
-        elif not j["jumping"]:
-            j["jumping"] = True
-            j["fall_speed"] = -8
-            j["jump_count"] += 1
-        
-        if j["jumping"]:
-            actor.y += j["fall_speed"]
-            j["fall_speed"] += GRAVITY * 0.6
-            if actor.y >= j["y_start"]:
-                actor.y = j["y_start"]
-                j["jumping"] = False
-                if j["jump_count"] >= 2:
-                    j["jump_count"] = 0
-                    j["pause_timer"] = 60
-        actor.x += 1
-        
 
-    for s in enemies["swoopers"]:
-        actor = s["actor"]
-        actor.x += s["speed"] * s["dir"]
-        actor.y = s["y_start"] + s["amplitude"] * math.sin((actor.x - s["x_start"]) * s["frequency"])
-        s["anim_timer"] = (s["anim_timer"] + 1) % 8
-        if s["anim_timer"] == 0:
-            s["frame_idx"] = (s["frame_idx"] + 1) % len(s["frames"])
-            actor.image = s["frames"][s["frame_idx"]]
-            
-    # Animação da bandeira
-    flag_timer = (flag_timer + 1) % 15
-    if flag_timer == 0:
-        flag_frame_idx = (flag_frame_idx + 1) % len(flag_frames)
-        flag_actor.image = flag_frames[flag_frame_idx]
-
-def hit_any_lethal_enemy():
-    """
-    Verifica se o player morreu.
-    Espinhos matam sempre. Inimigos matam se não for 'stomp' (pulo na cabeça).
-    """
-    global enemies, player
-    for spike in enemies["spikes"]:
-        if player.colliderect(spike):
-            return True
-            
-    for enemy_list in [enemies['walkers'], enemies['flyers'], enemies['jumpers'], enemies['swoopers']]:
-        for enemy_data in enemy_list:
-            enemy_actor = enemy_data["actor"]
-            if player.colliderect(enemy_actor):
-                if not (player.vy > 0 and player.bottom <= enemy_actor.y + 10):
-                    return True
-            
-    return False
-
-def animate_coins():
-    global coin_animation_timer, coins
-    coin_animation_timer += 1
-    if coin_animation_timer >= 10:
-        coin_animation_timer = 0
-        if coins:
-            current_frame = coins[0].image
-            for coin in coins:
-                coin.image = "coin_2" if current_frame == "coin_1" else "coin_1"
+
+def save_recording():
+    """Salva a partida atual (ou a última) para reproduzir com replay.py."""
+    if recording is None:
+        return
+    # Uma partida em andamento é gravada até o tick atual
+    if world.state == "playing":
+        recording.finish(world)
+    print(f"Replay salvo em {recording.save()}")
+
+
+def idle_wait():
+    """Segura o loop a IDLE_FPS numa tela parada, acordando na hora se chegar input."""
+    global last_idle_tick
+    deadline = last_idle_tick + 1.0 / IDLE_FPS
+    while time.perf_counter() < deadline and not pygame.event.peek(IDLE_WAKE_EVENTS):
+        time.sleep(0.01)
+    last_idle_tick = time.perf_counter()
+
+
+def invalidate(rect=None):
+    """Marca a tela inteira (ou só rect) para ser repintada no próximo draw()."""
+    global screen_dirty
+    if rect is None:
+        screen_dirty = True
+    else:
+        dirty_rects.append(rect)
 
 
 def draw():
+    global screen_dirty, painted_state, last_paint, first_frame
+    if first_frame:
+        first_frame = False
+        print(f"Primeira tela em {profiler.milestone('first_frame'):.0f} ms")
+    if game_state == "playing":
+        draw_game()
+        painted_state = game_state
+        return
+
+    # Telas paradas: repinta tudo ao mudar de estado (ou de tempos em tempos,
+    # caso a janela tenha sido coberta), senão só as regiões invalidadas
+    now = time.perf_counter()
+    if game_state != painted_state or now - last_paint > IDLE_REPAINT:
+        screen_dirty = True
+    if screen_dirty:
+        draw_idle_screen()
+        last_paint = now
+    else:
+        surface = screen.surface
+        for rect in dirty_rects:
+            surface.set_clip(rect)
+            draw_idle_screen()
+        surface.set_clip(None)
+    screen_dirty = False
+    dirty_rects.clear()
+    painted_state = game_state
+
+def draw_idle_screen():
     if game_state == "tutorial":
         draw_tutorial()
     elif game_state == "menu":
         draw_menu()
-    elif game_state == "playing":
-        draw_game()
     elif game_state == "game_over":
         draw_game_over()
     elif game_state == "complete":
         draw_complete()
 
+def draw_text(text, fontsize, color, **anchor):
+    """screen.draw.text com a fonte do jogo, reaproveitando a superfície já renderizada."""
+    text_cache.draw(screen.surface, text, "vcr_osd_mono", fontsize, color, **anchor)
+
 def draw_background():
     # Efeito parallax simples
-    try:
-        bg = images.background_game
-        bw = bg.get_width()
-        offset = int(camera_x * 0.2) % bw
-        screen.blit("background_game", (-offset, 0))
-        screen.blit("background_game", (-offset + bw, 0))
-    except KeyError:
+    if background is None:
         screen.fill((135, 206, 235))
+        return
+    bw = background.get_width()
+    if governor.active("parallax"):
+        # Fundo parado: um blit só por frame
+        screen.blit(background, (0, 0))
+        return
+    offset = int((world.camera_x if world else 0) * 0.2) % bw
+    screen.blit(background, (-offset, 0))
+    screen.blit(background, (-offset + bw, 0))
 
 def draw_ground():
-    # Chão infinito
-    tile = images.ground
+    # Chão infinito; no menu antes da primeira partida ainda não há World
+    camera_x = world.camera_x if world else 0
+    tile = load_atlas().frame("ground")
     tw = tile.get_width()
     y = ground_top_y()
     start_i = int((camera_x - 50) // tw)
     end_i = int((camera_x + WIDTH) // tw) + 2
+    surface = screen.surface
     for i in range(start_i, end_i):
-        screen.blit("ground", (i * tw - camera_x, y))
+        surface.blit(tile, (i * tw - camera_x, y))
 
 def draw_game():
+    profiler.start()
     draw_background()
-    draw_ground()
-    
-    for block in level_blocks:
-        screen.blit(block.image, (block.x - camera_x, block.y))
-    
-    for enemy_list in enemies.values():
-        for enemy in enemy_list:
-            actor = enemy["actor"] if isinstance(enemy, dict) and "actor" in enemy else enemy
-            screen.blit(actor.image, (actor.x - camera_x, actor.y))
-
-    for coin in coins:
-        screen.blit(coin.image, (coin.x - camera_x, coin.y))
-
-    screen.blit(player.image, (player.x - camera_x, player.y))
-    screen.blit(flag_actor.image, (flag_actor.x - camera_x, flag_actor.y))
-
-    screen.draw.text(f"Score: {score}", topright=(WIDTH - 20, 10),
-                     color="white", fontname="vcr_osd_mono", fontsize=30)
+    profiler.lap("background")
+    # Desenha entre os dois últimos ticks, conforme o quanto do próximo já passou
+    alpha = 1.0 if governor.active("interpolation") else timestep.alpha
+    camera_x, player_x, player_y = world.interpolated(alpha)
+    static_layer.draw(screen.surface, camera_x)
+    profiler.lap("static")
+
+    # Só o que cruza a janela da câmera é desenhado
+    lo = camera_x - CULL_MARGIN
+    hi = camera_x + WIDTH + CULL_MARGIN
+    view = world.draw_index.visible(lo, hi, DYNAMIC_KINDS)
+
+    # Um quadro por tipo, do relógio compartilhado, blitado direto do atlas
+    surface = screen.surface
+    clocks = world.clocks
+    drawn = 0
+    enemies_drawn = world.enemy_engine.visible(lo, hi, alpha)
+    for kind, xs, ys in enemies_drawn:
+        image = animations[kind][clocks[kind].frame]
+        for x, y in zip(xs, ys):
+            surface.blit(image, (x - camera_x, y))
+        drawn += len(xs)
+    profiler.lap("enemies")
+
+    image = animations["coins"][clocks["coins"].frame]
+    for coin in view["coins"]:
+        surface.blit(image, (coin.x - camera_x, coin.y))
+    profiler.lap("coins")
+
+    frame = atlas.frame
+    surface.blit(frame(world.player.image), (player_x - camera_x, player_y))
+    for flag_actor in view["flag"]:
+        surface.blit(frame(flag_actor.image), (flag_actor.x - camera_x, flag_actor.y))
+    profiler.lap("player")
+
+    # Cada valor do placar é rasterizado uma vez só, quando o score muda;
+    # com o jogo pesado, no máximo a cada HUD_INTERVAL frames
+    draw_text(f"Score: {governor.hud(world.score)}", 30, "white", topright=(WIDTH - 20, 10))
+    profiler.lap("hud")
+
+    if governor.active("animations"):
+        # Nos próximos ticks, só os relógios do que apareceu neste frame avançam
+        animated = {kind for kind, _, _ in enemies_drawn}
+        animated.update(kind for kind in DYNAMIC_KINDS if view[kind])
+        world.animated = animated
+    else:
+        world.animated = None
+
+    if profiler.enabled:
+        engine = world.enemy_engine
+        profiler.count("entities", len(world.grid.entries) + sum(g.n for g in engine.groups.values()))
+        profiler.count("simulated", engine.simulated)
+        profiler.count("culled", world.draw_index.skipped + engine.skipped)
+        profiler.count("blits", len(static_layer.visible_chunks(camera_x)) + drawn +
+                       len(view["coins"]) + 1 + len(view["flag"]))
+        profiler.count("quality", governor.level)
+        profiler.end_frame()
+        draw_profiler()
+
+    if frame_start is not None:
+        governor.frame(time.perf_counter() - frame_start)
+
+
+def draw_profiler():
+    """Overlay do profiler (F3): p50/p95/p99 de cada fase e os contadores."""
+    global profile_lines
+    # Os percentis mudam devagar; recalcular a cada PROFILE_REFRESH frames basta
+    if profiler.frames % PROFILE_REFRESH == 1 or not profile_lines:
+        profile_lines = [f"{'fase (ms)':<20}{'p50':>7}{'p95':>7}{'p99':>7}"]
+        for phase, (p50, p95, p99) in profiler.percentiles().items():
+            profile_lines.append(f"{phase:<20}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+        profile_lines.append("  ".join(f"{name}: {value}" for name, value in profiler.counts.items()))
+        profile_lines.append("início (ms)  " + "  ".join(
+            f"{name}: {ms:.0f}" for name, ms in profiler.milestones.items()))
+        quality = governor.metrics()
+        profile_lines.append(f"qualidade {quality['level']} ({', '.join(quality['active']) or 'máxima'})"
+                             f"  p90 {quality['p90_ms']:.1f}/{quality['budget_ms']:.1f} ms")
+    screen.draw.filled_rect(Rect(5, 5, 420, 16 * len(profile_lines) + 10), (0, 0, 0))
+    for i, line in enumerate(profile_lines):
+        draw_text(line, 14, "white", topleft=(10, 10 + 16 * i))
 
 def draw_tutorial():
     draw_background()
-    screen.draw.text("Bem-vindo ao Pixel Dash!", center=(WIDTH // 2, HEIGHT // 2 - 150),
-                     fontsize=32, color="white", fontname="vcr_osd_mono")
-    screen.draw.text("Controles:", center=(WIDTH // 2, HEIGHT // 2 - 50),
-                     fontsize=32, color="yellow", fontname="vcr_osd_mono")
-    screen.draw.text("W ou Seta para Cima para Pular", center=(WIDTH // 2, HEIGHT // 2),
-                     fontsize=24, color="white", fontname="vcr_osd_mono")
-    screen.draw.text("Aperte a tecla de pulo novamente no ar para Pulo Duplo.", center=(WIDTH // 2, HEIGHT // 2 + 30),
-                     fontsize=24, color="white", fontname="vcr_osd_mono")
-    screen.draw.text("A ou Seta para Esquerda para mover para a Esquerda", center=(WIDTH // 2, HEIGHT // 2 + 60),
-                     fontsize=24, color="white", fontname="vcr_osd_mono")
-    screen.draw.text("D ou Seta para Direita para mover para a Direita", center=(WIDTH // 2, HEIGHT // 2 + 90),
-                     fontsize=24, color="white", fontname="vcr_osd_mono")
-    screen.draw.text("Pressione qualquer tecla para continuar...", center=(WIDTH // 2, HEIGHT // 2 + 200),
-                     fontsize=28, color="red", fontname="vcr_osd_mono")
+    draw_text("Bem-vindo ao Pixel Dash!", 32, "white", center=(WIDTH // 2, HEIGHT // 2 - 150))
+    draw_text("Controles:", 32, "yellow", center=(WIDTH // 2, HEIGHT // 2 - 50))
+    draw_text("W ou Seta para Cima para Pular", 24, "white", center=(WIDTH // 2, HEIGHT // 2))
+    draw_text("Aperte a tecla de pulo novamente no ar para Pulo Duplo.", 24, "white", center=(WIDTH // 2, HEIGHT // 2 + 30))
+    draw_text("A ou Seta para Esquerda para mover para a Esquerda", 24, "white", center=(WIDTH // 2, HEIGHT // 2 + 60))
+    draw_text("D ou Seta para Direita para mover para a Direita", 24, "white", center=(WIDTH // 2, HEIGHT // 2 + 90))
+    draw_text("Pressione qualquer tecla para continuar...", 28, "red", center=(WIDTH // 2, HEIGHT // 2 + 200))
 
 def draw_menu():
     draw_background()
     draw_ground()
     start_button.draw()
+    endless_button.draw()
     quit_button.draw()
     music_button.text = f"Music: {'ON' if music_on else 'OFF'}"
     music_button.draw()
@@ -522,51 +542,87 @@ def draw_menu():
 def draw_game_over():
     draw_background()
     draw_ground()
-    screen.draw.text("GAME OVER", center=(WIDTH // 2, HEIGHT // 2 - 60),
-                     fontsize=72, color="red", fontname="vcr_osd_mono")
-    screen.draw.text("Clique para reiniciar", center=(WIDTH // 2, HEIGHT // 2 + 10),
-                     fontsize=36, color="white", fontname="vcr_osd_mono")
+    draw_text("GAME OVER", 72, "red", center=(WIDTH // 2, HEIGHT // 2 - 60))
+    if world.checkpoint is not None:
+        draw_text("Clique para voltar ao checkpoint", 36, "white", center=(WIDTH // 2, HEIGHT // 2 + 10))
+    else:
+        draw_text("Clique para reiniciar", 36, "white", center=(WIDTH // 2, HEIGHT // 2 + 10))
+    draw_stage_keys()
 
 def draw_complete():
     draw_background()
     draw_ground()
-    if all_coins_collected:
-        screen.draw.text("Level Completo. Parabéns!",
-                         center=(WIDTH // 2, HEIGHT // 2 - 30),
-                         fontsize=30, color="yellow", fontname="vcr_osd_mono")
-        screen.draw.text("Você conseguiu coletar todas as moedas!",
-                         center=(WIDTH // 2, HEIGHT // 2 + 10),
-                         fontsize=30, color="yellow", fontname="vcr_osd_mono")
+    if world.all_coins_collected:
+        draw_text("Level Completo. Parabéns!", 30, "yellow", center=(WIDTH // 2, HEIGHT // 2 - 30))
+        draw_text("Você conseguiu coletar todas as moedas!", 30, "yellow", center=(WIDTH // 2, HEIGHT // 2 + 10))
     else:
-        screen.draw.text("LEVEL COMPLETO", center=(WIDTH // 2, HEIGHT // 2 - 40),
-                         fontsize=72, color="yellow", fontname="vcr_osd_mono")
-        screen.draw.text(f"Sua pontuação: {score}", center=(WIDTH // 2, HEIGHT // 2 + 40),
-                         fontsize=40, color="yellow", fontname="vcr_osd_mono")
+        draw_text("LEVEL COMPLETO", 72, "yellow", center=(WIDTH // 2, HEIGHT // 2 - 40))
+        draw_text(f"Sua pontuação: {world.score}", 40, "yellow", center=(WIDTH // 2, HEIGHT // 2 + 40))
+    if stage is not None and campaign.has(stage.index + 1):
+        draw_text("Clique para a próxima fase", 36, "white", center=(WIDTH // 2, HEIGHT // 2 + 100))
+    draw_stage_keys()
+
+def draw_stage_keys():
+    # Atalhos das telas de fim de partida, só na campanha
+    if stage is None:
+        return
+    hint = "R: jogar a fase de novo"
+    if campaign.has(stage.index - 1):
+        hint += "   P: fase anterior"
+    hint += "   M: menu"
+    draw_text(hint, 24, "white", center=(WIDTH // 2, HEIGHT // 2 + 150))
+
+def back_to_menu():
+    """Sai da tela de fim de partida para o menu, deixando a campanha."""
+    global game_state, stage
+    stage = None
+    game_state = "menu"
 
 def on_key_down(key):
-    global game_state
+    global game_state, jump_presses
+    if key == keys.F3:
+        profiler.toggle()
+        return
+    if key == keys.F4:
+        print(f"Profile salvo em {profiler.dump_csv()}")
+        return
+    if key == keys.F5:
+        save_recording()
+        return
+
     if game_state == "tutorial":
         game_state = "menu"
+        prepare_campaign()
         return
-        
-    if game_state != "playing":
+
+    # Jogar de novo e voltar uma fase vêm do cache da campanha, sem espera
+    if game_state in ("game_over", "complete") and stage is not None and not replay_feed:
+        if key == keys.R:
+            play_stage(stage.index)
+        elif key == keys.P and campaign.has(stage.index - 1):
+            play_stage(stage.index - 1)
+        elif key == keys.M:
+            back_to_menu()
+        return
+
+    if game_state != "playing" or replay_feed:
         return
         
-    if key in (keys.W, keys.UP, keys.SPACE) and player.jumps_left > 0:
-        player.vy = -JUMP_POWER
-        player.jumps_left -= 1
-        if sounds_on:
-            try:
-                sounds.jump.set_volume(0.2)
-                sounds.jump.play()
-            except AttributeError:
-                print("WARNING: 'jump.wav' sound file not found!")
+    # O pulo é aplicado pelo World no início do próximo tick
+    if key in (keys.W, keys.UP, keys.SPACE):
+        jump_presses += 1
+        player = world.player
+        telemetry.record(PRESS, world.tick, player.x, player.y, player.vy)
 
 def on_mouse_down(pos):
     global game_state, music_on, sounds_on
     if game_state == "menu":
         if start_button.is_clicked(pos):
-            reset_game()
+            play_stage(0)
+        elif endless_button.is_clicked(pos):
+            seed = random.getrandbits(64)
+            load_content()
+            reset_game(seed, EndlessLevel(seed))
             game_state = "playing"
             play_background_music()
         elif quit_button.is_clicked(pos):
@@ -577,10 +633,21 @@ def on_mouse_down(pos):
                 play_background_music()
             else:
                 stop_background_music()
+            invalidate(music_button.bounds())
         elif sounds_button.is_clicked(pos):
             sounds_on = not sounds_on
+            sound_queue.enabled = sounds_on
+            invalidate(sounds_button.bounds())
+    elif game_state == "game_over" and world.checkpoint is not None and not replay_feed:
+        respawn()
+    elif game_state == "game_over" and stage is not None:
+        play_stage(stage.index)
+    elif game_state == "complete" and stage is not None and campaign.has(stage.index + 1):
+        # A próxima fase foi montada enquanto esta era jogada: a troca é imediata
+        play_stage(stage.index + 1)
     elif game_state == "game_over" or game_state == "complete":
-        game_state = "menu"
+        back_to_menu()
 
-reset_game()
+if replay_feed:
+    start_replay()
 pgzrun.go()
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Pré-carregamento em segundo plano durante a tela de tutorial.
+
+Uma thread lê a fase (o JSON e o cache compilado) e depois aquece o áudio:
+carrega cada som de sounds/ na SoundQueue (decodificado e com o volume já
+ajustado) e lê os arquivos de music/ uma vez para eles estarem no cache do
+sistema quando a música começar. Assim nem a primeira moeda nem o primeiro
+pulo esperam o disco, o que pesa em cartões SD lentos.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from level_loader import DEFAULT_LEVEL, load_level
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SOUNDS_DIR = os.path.join(ROOT, "sounds")
+MUSIC_DIR = os.path.join(ROOT, "music")
+READ_CHUNK = 1 << 20
+MUSIC_EXTENSIONS = (".mp3", ".ogg", ".wav")
+
+
+def _names(directory, extensions):
+    try:
+        files = sorted(os.listdir(directory))
+    except OSError:
+        return []
+    return [f for f in files if os.path.splitext(f)[1].lower() in extensions]
+
+
+def read_through(path):
+    """Lê o arquivo inteiro e descarta, só para ele ir para o cache do disco."""
+    with open(path, "rb") as f:
+        while f.read(READ_CHUNK):
+            pass
+
+
+def warm_music(name):
+    """Aquece só a música name de music/ (a de uma fase), se ela existir."""
+    for filename in _names(MUSIC_DIR, MUSIC_EXTENSIONS):
+        if os.path.splitext(filename)[0] == name:
+            try:
+                read_through(os.path.join(MUSIC_DIR, filename))
+            except OSError:
+                pass
+            return
+
+
+class Preloader:
+    """
+    Carrega a fase e aquece o áudio numa thread só, nessa ordem.
+    milestone(nome) é chamado ao fim de cada etapa ("level", "audio").
+    """
+
+    def __init__(self, milestone, level_path=DEFAULT_LEVEL):
+        self.milestone = milestone
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preload")
+        self.level_future = self.executor.submit(self._load_level, level_path)
+
+    def _load_level(self, path):
+        level = load_level(path)
+        self.milestone("level")
+        return level
+
+    def level(self):
+        """A fase pré-carregada, esperando a thread se ela ainda não terminou."""
+        return self.level_future.result()
+
+    def warm_audio(self, queue):
+        """Agenda o carregamento dos sons na SoundQueue e o aquecimento da música."""
+        return self.executor.submit(self._warm_audio, queue)
+
+    def _warm_audio(self, queue):
+        queue.preload(os.path.splitext(f)[0] for f in _names(SOUNDS_DIR, (".wav", ".ogg")))
+        for filename in _names(MUSIC_DIR, MUSIC_EXTENSIONS):
+            try:
+                read_through(os.path.join(MUSIC_DIR, filename))
+            except OSError:
+                pass
+        self.milestone("audio")
@@ -0,0 +1,449 @@
+"""
+Modo infinito: fase gerada proceduralmente à frente da câmera.
+
+EndlessLevel tem a mesma interface de LevelData (rows_in, sprites_in,
+start, flag...), então World, streaming e StaticLayer não sabem que a fase
+não vem de um arquivo. A fase é cortada em seções de SECTION_WIDTH px; a
+seção i depende só da semente e de i, começa e termina em chão livre, e por
+isso pode ser descartada quando fica para trás e refeita igual se o player
+voltar. A memória fica limitada às seções perto da câmera.
+
+A geração é um gerador Python retomável: advance() roda um elemento por vez
+(uma fileira de espinhos, uma escada de plataformas...) até esgotar o
+orçamento do frame ou ter seções suficientes à frente. Se o World pedir uma
+seção que ainda não existe, ela é gerada na hora; com o orçamento em dia
+isso não acontece.
+
+Cada seção pronta passa por validate(), que confere com a tabela de arcos
+de pulo (calculada com GRAVITY, JUMP_POWER e PLAYER_SPEED, com e sem pulo
+duplo) se dá para pular cada fileira de espinhos e cada inimigo, subir em
+cada plataforma e alcançar cada moeda. Seções reprovadas são sorteadas de
+novo; depois de MAX_ATTEMPTS, a seção fica só com chão.
+"""
+import hashlib
+import math
+import random
+import time
+from itertools import chain, count
+
+import numpy as np
+
+from entities import ground_top_y, sprite_size
+from level_loader import ENEMY_FIELDS, LevelError
+from settings import GRAVITY, JUMP_POWER, PLAYER_SPEED, WIDTH
+from streaming import HYSTERESIS, LOAD_MARGIN, STREAM_CHUNK
+
+GENERATOR_VERSION = 1
+INF = float("inf")
+
+SECTION_WIDTH = 1600
+# Espaço de uids de cada seção: uid = seção * SECTION_UIDS + índice na seção
+SECTION_UIDS = 1000
+START = (150, 500)
+# Chão livre no começo da fase e nas bordas de cada seção
+SPAWN_CLEAR = 500
+EDGE_PAD = 120
+MAX_ATTEMPTS = 8
+# Quanto gerar à frente da câmera e manter atrás dela, em px
+AHEAD = WIDTH + LOAD_MARGIN + HYSTERESIS + 2 * SECTION_WIDTH
+BEHIND = LOAD_MARGIN + HYSTERESIS + STREAM_CHUNK + SECTION_WIDTH
+# Orçamento padrão de advance() por frame, em segundos
+FRAME_BUDGET = 0.001
+# Fração do alcance do pulo usada no gerador, para sobrar folga
+SAFETY = 0.8
+
+PLATFORM_IMAGES = ("platform_small", "platform_medium", "platform_large")
+PLAYER_W, PLAYER_H = sprite_size("hero_idle_1")
+SPIKE_W, SPIKE_H = sprite_size("enemy_spike")
+COIN_W, COIN_H = sprite_size("coin_1")
+ENEMY_W, ENEMY_H = sprite_size("enemy_walk_1")
+TILE_W, TILE_H = sprite_size("platform_medium")
+
+
+def jump_arcs():
+    """
+    Altura do player (px acima do ponto de partida) a cada tick de BASE_HZ
+    depois de um pulo, até voltar ao chão: um arco sem pulo duplo e um para
+    cada tick em que o segundo pulo pode ser dado. Mesma ordem de contas do
+    World.step: vy recebe a gravidade e depois move o player.
+    """
+    arcs = []
+    for second in chain([None], count(1)):
+        height = 0.0
+        vy = -JUMP_POWER
+        heights = []
+        for tick in count(1):
+            if tick == second:
+                vy = -JUMP_POWER
+            vy += GRAVITY
+            height -= vy
+            if height <= 0:
+                break
+            heights.append(height)
+        arcs.append(heights)
+        if second is not None and second > len(arcs[0]):
+            break
+    return arcs
+
+
+ARCS = jump_arcs()
+MAX_RISE = max(max(arc) for arc in ARCS)
+# Distância horizontal de um pulo inteiro, do chão ao chão
+JUMP_SPAN = max(len(arc) for arc in ARCS) * PLAYER_SPEED
+
+
+def _tables():
+    clear = [0.0] * (int(MAX_RISE) + 2)
+    run = [0.0] * (int(MAX_RISE) + 2)
+    for arc in ARCS:
+        for h in range(len(clear)):
+            # Maior trecho contínuo do arco com altura >= h
+            best = length = 0
+            for height in arc:
+                length = length + 1 if height >= h else 0
+                best = max(best, length)
+            clear[h] = max(clear[h], best * PLAYER_SPEED)
+            # Maior distância em que o arco, já descendo, ainda está a >= h
+            for tick in range(len(arc) - 1, 0, -1):
+                if arc[tick] >= h and arc[tick] <= arc[tick - 1]:
+                    run[h] = max(run[h], (tick + 1) * PLAYER_SPEED)
+                    break
+    return clear, run
+
+
+# CLEAR[h]: quantos px o player consegue passar a pelo menos h px de altura.
+# RUN[h]: até quantos px à frente ele consegue pousar numa superfície h px acima.
+CLEAR, RUN = _tables()
+
+
+def clear_span(height):
+    h = max(0, math.ceil(height))
+    return CLEAR[h] if h < len(CLEAR) else 0.0
+
+
+def landing_run(rise):
+    h = max(0, math.ceil(rise))
+    return RUN[h] if h < len(RUN) else 0.0
+
+
+class Section:
+    """Conteúdo de uma seção, em arrays por grupo no formato do LevelData."""
+
+    def __init__(self, index, left, blocks, spikes, coins, enemies):
+        self.index = index
+        self.left = left
+        self.right = left + SECTION_WIDTH
+        base = index * SECTION_UIDS
+        self.groups = {}
+        block_rows = [(PLATFORM_IMAGES.index(image), x, y) for image, x, y in blocks]
+        self.groups["blocks"] = self._table(base, ("image", "x", "y"), block_rows,
+                                            {"image": np.uint16})
+        self.groups["spikes"] = self._table(base, ("x", "y"), spikes)
+        self.groups["coins"] = self._table(base, ("x", "y"), coins)
+        for kind, fields in ENEMY_FIELDS.items():
+            names = ("x", "y") + fields
+            rows = [tuple(entry[name] for name in names) for entry in enemies.get(kind, ())]
+            self.groups[kind] = self._table(base, names, rows)
+
+    @staticmethod
+    def _table(base, names, rows, dtypes=None):
+        if len(rows) > SECTION_UIDS:
+            raise LevelError("seção com entidades demais")
+        dtypes = dtypes or {}
+        columns = list(zip(*rows)) if rows else [()] * len(names)
+        table = {name: np.array(column, dtypes.get(name, np.float64))
+                 for name, column in zip(names, columns)}
+        table["uid"] = base + np.arange(len(rows), dtype=np.int64)
+        return table
+
+
+class SectionBuilder:
+    """Sorteia os elementos de uma seção; cada elemento ocupa [x, x + largura)."""
+
+    def __init__(self, index, rng):
+        self.index = index
+        self.rng = rng
+        self.left = index * SECTION_WIDTH
+        self.ground = ground_top_y()
+        self.blocks = []
+        self.spikes = []
+        self.coins = []
+        self.enemies = {}
+        # Plataformas como (esquerda, direita, altura do topo acima do chão)
+        self.platforms = []
+        self.spike_runs = []
+
+    def coin(self, x, height):
+        """Moeda com o centro height px acima do chão."""
+        self.coins.append((x, self.ground - height))
+
+    def enemy(self, kind, **entry):
+        self.enemies.setdefault(kind, []).append(entry)
+
+    def flat(self, x):
+        rng = self.rng
+        width = rng.randrange(120, 300, 20)
+        if rng.random() < 0.5:
+            height = rng.choice((40, 80, 120))
+            for cx in range(x + 30, x + width - 20, 40):
+                self.coin(cx, height)
+        return width
+
+    def spike_run(self, x):
+        rng = self.rng
+        n = rng.randint(1, 4)
+        pad = JUMP_SPAN // 2
+        left = x + pad
+        for i in range(n):
+            self.spikes.append((left + SPIKE_W // 2 + i * SPIKE_W, self.ground - SPIKE_H / 2))
+        self.spike_runs.append((left, left + n * SPIKE_W))
+        if rng.random() < 0.6:
+            # Moedas no alto do arco sobre os espinhos
+            self.coin(left + n * SPIKE_W // 2, min(MAX_RISE * SAFETY * 0.6, 90))
+        return 2 * pad + n * SPIKE_W
+
+    def platforms_up(self, x):
+        rng = self.rng
+        steps = rng.randint(1, 3)
+        height = 0.0
+        cursor = x + 40
+        for _ in range(steps):
+            rise = rng.uniform(40, MAX_RISE * SAFETY)
+            gap = rng.uniform(20, max(21, landing_run(rise) * SAFETY))
+            if height == 0.0:
+                gap = rng.uniform(0, 60)
+            height += rise
+            tiles = rng.randint(4, 8)
+            image = rng.choice(PLATFORM_IMAGES)
+            left = cursor + gap
+            for t in range(tiles):
+                self.blocks.append((image, left + TILE_W / 2 + t * TILE_W,
+                                    self.ground - height + TILE_H / 2))
+            right = left + tiles * TILE_W
+            self.platforms.append((left, right, height))
+            if rng.random() < 0.7:
+                self.coin((left + right) / 2, height + rng.choice((30, 60)))
+            cursor = right
+        return int(cursor - x) + 60
+
+    def walker(self, x):
+        rng = self.rng
+        width = rng.randrange(160, 320, 20)
+        cx = x + width / 2
+        self.enemy("walkers", x=cx, y=self.ground - 20, patrol_left=x + 20,
+                   patrol_right=x + width - 20, dir=rng.choice((-1, 1)), speed=0,
+                   x_start=cx, y_start=self.ground - 20, amplitude=0, frequency=0)
+        return width
+
+    def flyer(self, x):
+        rng = self.rng
+        width = rng.randrange(200, 400, 20)
+        cx = x + width / 2
+        y = self.ground - rng.uniform(PLAYER_H + ENEMY_H / 2 + 20, 200)
+        self.enemy("flyers", x=cx, y=y, patrol_left=x + 20, patrol_right=x + width - 20,
+                   dir=rng.choice((-1, 1)), speed=rng.choice((1.5, 2, 2.5)),
+                   x_start=cx, y_start=y, amplitude=0, frequency=0)
+        return width
+
+    FEATURES = ((flat, 3), (spike_run, 3), (platforms_up, 3), (walker, 1), (flyer, 1))
+
+    def build(self):
+        """Gerador: sorteia um elemento por next(); termina com a seção pronta."""
+        rng = self.rng
+        builders = [f for f, _ in self.FEATURES]
+        weights = [w for _, w in self.FEATURES]
+        x = self.left + (SPAWN_CLEAR if self.index == 0 else EDGE_PAD)
+        end = self.left + SECTION_WIDTH - EDGE_PAD
+        while True:
+            builder = rng.choices(builders, weights)[0]
+            # O elemento é desfeito se passar do fim da seção
+            saved = (len(self.blocks), len(self.spikes), len(self.coins), len(self.platforms),
+                     len(self.spike_runs), {k: len(v) for k, v in self.enemies.items()})
+            width = builder(self, x)
+            if x + width > end:
+                self._undo(saved)
+                break
+            x += width + rng.randrange(20, 120, 20)
+            yield
+
+    def _undo(self, saved):
+        blocks, spikes, coins, platforms, runs, enemies = saved
+        del self.blocks[blocks:]
+        del self.spikes[spikes:]
+        del self.coins[coins:]
+        del self.platforms[platforms:]
+        del self.spike_runs[runs:]
+        for kind, entries in self.enemies.items():
+            del entries[enemies.get(kind, 0):]
+
+    def section(self):
+        return Section(self.index, self.left, self.blocks, self.spikes, self.coins, self.enemies)
+
+
+def validate(builder):
+    """Lista de problemas de alcance na seção montada (vazia se ela é jogável)."""
+    problems = []
+    ground = builder.ground
+    platforms = builder.platforms
+    reach = MAX_RISE * SAFETY
+
+    for left, right in builder.spike_runs:
+        if clear_span(SPIKE_H + 2) < (right - left) + PLAYER_W + 8:
+            problems.append(f"espinhos largos demais em x={left}")
+        # Nenhum bloco baixo no caminho do pulo sobre os espinhos
+        for bl, br, height in platforms:
+            if br > left - JUMP_SPAN / 2 and bl < right + JUMP_SPAN / 2 and height < MAX_RISE + PLAYER_H:
+                problems.append(f"plataforma sobre os espinhos em x={left}")
+
+    surfaces = [(-INF, INF, 0.0)] + platforms
+    for left, right, height in platforms:
+        ok = False
+        for sl, sr, sh in surfaces:
+            if (sl, sr, sh) == (left, right, height):
+                continue
+            rise = height - sh
+            gap = max(0.0, left - sr, sl - right)
+            if rise <= 0 or (rise <= reach and gap <= landing_run(rise)):
+                ok = True
+                break
+        if not ok:
+            problems.append(f"plataforma inalcançável em x={left}")
+
+    for x, y in builder.coins:
+        bottom = ground - (y + COIN_H / 2)
+        if not any(sl - JUMP_SPAN / 2 <= x <= sr + JUMP_SPAN / 2 and
+                   bottom - sh <= reach + PLAYER_H for sl, sr, sh in surfaces):
+            problems.append(f"moeda inalcançável em x={x}")
+
+    for kind, entries in builder.enemies.items():
+        for entry in entries:
+            bottom = ground - (entry["y"] + ENEMY_H / 2)
+            # Ou dá para passar por baixo, ou dá para pular por cima
+            if bottom < PLAYER_H + 8 and clear_span(ENEMY_H + bottom + 2) < ENEMY_W + PLAYER_W + 8:
+                problems.append(f"{kind} impossível de passar em x={entry['x']}")
+    return problems
+
+
+class EndlessLevel:
+    """Fase infinita com a interface do LevelData; ver o docstring do módulo."""
+
+    images = PLATFORM_IMAGES
+    length = INF
+    checkpoints = ()
+    music = None
+    # A fase não termina, então o total de moedas nunca é comparado
+    total_coins = 0
+
+    def __init__(self, seed=0):
+        self.seed = seed
+        self.name = f"Infinita #{seed}"
+        h = hashlib.sha1(b"pixel-dash-endless-%d\0%d" % (GENERATOR_VERSION, seed))
+        self.digest = h.hexdigest()
+        # Um arquivo de telemetria para todas as sementes (a semente vai no
+        # session de cada evento), não um por partida
+        self.telemetry_key = f"endless-{GENERATOR_VERSION}"
+        self.start = START
+        self.flag = (INF, 0.0)
+        self.sections = {}
+        self.frontier = 0
+        self.generated = 0
+        self.rejected = 0
+        self._work = self._generate()
+
+    def _builder(self, index, attempt):
+        return SectionBuilder(index, random.Random(f"{self.seed}:{index}:{attempt}"))
+
+    def _build(self, index):
+        """Gerador que monta a seção index, validando; devolve a Section."""
+        for attempt in range(MAX_ATTEMPTS):
+            builder = self._builder(index, attempt)
+            yield from builder.build()
+            if not validate(builder):
+                return builder.section()
+            self.rejected += 1
+            yield
+        # Sem sorte: seção só de chão
+        return Section(index, index * SECTION_WIDTH, [], [], [], {})
+
+    def _store(self, section):
+        self.sections[section.index] = section
+        self.generated += 1
+
+    def _generate(self):
+        for index in count():
+            if index not in self.sections:
+                section = yield from self._build(index)
+                # section() pode ter gerado a mesma seção enquanto esta esperava
+                if index not in self.sections:
+                    self._store(section)
+            self.frontier = index + 1
+
+    def section(self, index):
+        """A seção index, gerada na hora se ainda não existe (ou foi descartada)."""
+        section = self.sections.get(index)
+        if section is None:
+            work = self._build(index)
+            try:
+                while True:
+                    next(work)
+            except StopIteration as done:
+                section = done.value
+            self._store(section)
+        return section
+
+    def advance(self, camera_x, budget=FRAME_BUDGET):
+        """
+        Gera seções à frente de camera_x por no máximo budget segundos e
+        descarta as que ficaram longe. Devolve quantas seções existem.
+        """
+        deadline = time.perf_counter() + budget
+        target = int((camera_x + AHEAD) // SECTION_WIDTH)
+        while self.frontier <= target and time.perf_counter() < deadline:
+            next(self._work)
+        first = self._first_kept(camera_x)
+        for index in [i for i in self.sections if i < first or i > target + 1]:
+            del self.sections[index]
+        return len(self.sections)
+
+    @staticmethod
+    def _first_kept(camera_x):
+        return int((camera_x - BEHIND) // SECTION_WIDTH)
+
+    def uid_floor(self, camera_x):
+        """
+        Primeiro uid da primeira seção que advance() mantém com a câmera em
+        camera_x. Só depende da câmera, não de quando advance() rodou, então
+        o World pode esquecer os uids de baixo sem o replay divergir.
+        """
+        return max(0, self._first_kept(camera_x)) * SECTION_UIDS
+
+    def _indices(self, lo, hi):
+        if lo == -INF or hi == INF:
+            raise LevelError("a fase infinita só pode ser carregada com streaming")
+        return range(max(0, int(lo // SECTION_WIDTH)), max(0, int(hi // SECTION_WIDTH) + 1))
+
+    def rows_in(self, group, lo, hi):
+        """Como LevelData.rows_in: linhas com x em [lo, hi), em ordem de uid."""
+        parts = []
+        for index in self._indices(lo, hi):
+            table = self.section(index).groups[group]
+            xs = table["x"]
+            mask = (xs >= lo) & (xs < hi)
+            parts.append({name: values[mask] for name, values in table.items()})
+        if not parts:
+            return {name: values[:0] for name, values in self.section(0).groups[group].items()}
+        return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+    def sprites_in(self, lo, hi):
+        rows = self.rows_in("blocks", lo, hi)
+        for image_id, x, y in zip(rows["image"].tolist(), rows["x"].tolist(), rows["y"].tolist()):
+            yield PLATFORM_IMAGES[image_id], x, y
+        rows = self.rows_in("spikes", lo, hi)
+        for x, y in zip(rows["x"].tolist(), rows["y"].tolist()):
+            yield "enemy_spike", x, y
+
+    def coin(self, uid):
+        """(x, y) da moeda uid."""
+        index, row = divmod(uid, SECTION_UIDS)
+        table = self.section(index).groups["coins"]
+        return float(table["x"][row]), float(table["y"][row])
@@ -0,0 +1,102 @@
+"""
+Profiler por fase do frame.
+Cada frame vira uma linha de um ring buffer de tamanho fixo, com os ms gastos
+em cada fase do update() e do draw_game(). Desligado, lap() e count() voltam
+logo na primeira linha, então as marcações podem ficar no código de produção.
+As etapas da inicialização (milestone()) são marcadas sempre, ligado ou não.
+"""
+import csv
+import time
+
+import numpy as np
+
+FRAMES = 600
+
+UPDATE_PHASES = ("input", "gravity", "check_collisions", "update_all_enemies",
+                 "animate_coins", "hit_any_lethal_enemy", "stream")
+# "static" é o chão com blocos e espinhos, que são assados juntos na StaticLayer
+DRAW_PHASES = ("background", "static", "enemies", "coins", "player", "hud")
+PHASES = UPDATE_PHASES + DRAW_PHASES
+
+
+class Profiler:
+    def __init__(self, phases=PHASES, frames=FRAMES):
+        self.phases = tuple(phases)
+        self.columns = {phase: i for i, phase in enumerate(self.phases)}
+        self.samples = np.zeros((frames, len(self.phases)))
+        self.frames = 0
+        self.enabled = False
+        # Contadores do último frame (entidades, blits...)
+        self.counts = {}
+        self._row = self.samples[0]
+        self._last = 0.0
+        # Etapas da inicialização: nome -> ms desde a criação do profiler
+        self.created = time.perf_counter()
+        self.milestones = {}
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.start()
+
+    def clear(self):
+        self.samples[:] = 0
+        self.frames = 0
+        self._row = self.samples[0]
+
+    def start(self):
+        """Zera o cronômetro; a próxima lap() mede a partir daqui."""
+        self._last = time.perf_counter()
+
+    def lap(self, phase):
+        """Soma à fase o tempo desde a última marca."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._row[self.columns[phase]] += (now - self._last) * 1000.0
+        self._last = now
+
+    def count(self, name, value):
+        if self.enabled:
+            self.counts[name] = value
+
+    def milestone(self, name):
+        """Marca que a etapa name terminou agora; pode vir de outra thread."""
+        ms = self.milestones[name] = (time.perf_counter() - self.created) * 1000.0
+        return ms
+
+    def end_frame(self):
+        """Fecha a linha do frame atual e abre a próxima no ring buffer."""
+        if not self.enabled:
+            return
+        self.frames += 1
+        self._row = self.samples[self.frames % len(self.samples)]
+        self._row[:] = 0
+
+    def recorded(self):
+        """Frames já fechados, do mais antigo ao mais novo."""
+        size = len(self.samples)
+        if self.frames < size:
+            return self.samples[:self.frames]
+        start = self.frames % size
+        return np.concatenate((self.samples[start + 1:], self.samples[:start]))
+
+    def percentiles(self, q=(50, 95, 99)):
+        """{fase: (p50, p95, p99)} em ms."""
+        rows = self.recorded()
+        if not len(rows):
+            return {}
+        table = np.percentile(rows, q, axis=0)
+        return {phase: tuple(table[:, i].tolist()) for i, phase in enumerate(self.phases)}
+
+    def dump_csv(self, path=None):
+        """Grava os frames do buffer em CSV (um frame por linha) e devolve o caminho."""
+        if path is None:
+            path = time.strftime("profile_%Y%m%d_%H%M%S.csv")
+        rows = self.recorded()
+        first = self.frames - len(rows)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("frame",) + self.phases)
+            for i, row in enumerate(rows.tolist()):
+                writer.writerow([first + i] + [f"{ms:.4f}" for ms in row])
+        return path
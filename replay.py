@@ -0,0 +1,253 @@
+"""
+Gravação e replay determinístico de partidas.
+
+O World é determinístico: a mesma fase, a mesma semente e a mesma sequência
+de Inputs levam sempre ao mesmo estado. Então uma partida inteira cabe num
+log binário com um byte por tick (esquerda, direita e quantos pulos),
+comprimido com zlib, mais um cabeçalho com a semente, o SIM_HZ, o streaming,
+o hash da fase e o checksum do estado final.
+
+Formato (little-endian):
+    cabeçalho  "PXDR", versão u16, flags u16, sim_hz u16, semente u64,
+               SHA-1 da fase (20 bytes), ticks u32, checksum (8 bytes)
+    corpo      zlib dos bytes de cada tick: bit 0 esquerda, bit 1 direita,
+               bits 2-7 pulos (até MAX_JUMPS); o byte RESPAWN marca a volta
+               ao último checkpoint depois de uma morte
+
+O replay pode rodar em tempo real dentro do jogo (PIXEL_DASH_REPLAY=arquivo
+pgzrun pixel_dash.py) ou sem janela e sem limite de velocidade:
+
+    python replay.py partida.pxr                # confere o checksum final
+    python replay.py partida.pxr --realtime     # assiste no jogo
+"""
+import argparse
+import hashlib
+import os
+import struct
+import subprocess
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from campaign import campaign_paths
+from level_loader import load_level
+from procgen import EndlessLevel
+from settings import SIM_HZ
+from world import ENEMY_KINDS, Inputs, World
+
+MAGIC = b"PXDR"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHHQ20sI8s")
+# flags do cabeçalho
+STREAMING = 1
+MAX_JUMPS = 62
+RESPAWN = 0xFF
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+class ReplayError(ValueError):
+    """Arquivo de replay inválido ou incompatível com a fase."""
+
+
+def pack_inputs(inputs):
+    return inputs.left | inputs.right << 1 | min(inputs.jump, MAX_JUMPS) << 2
+
+
+def unpack_inputs(byte):
+    """Os Inputs do byte, ou None para RESPAWN."""
+    if byte == RESPAWN:
+        return None
+    return Inputs(bool(byte & 1), bool(byte & 2), byte >> 2)
+
+
+def state_checksum(world):
+    """Hash de 8 bytes do estado da partida: player, câmera, placar, moedas e inimigos."""
+    player = world.player
+    h = hashlib.blake2b(digest_size=8)
+    h.update(struct.pack("<I8sI4d?B", world.tick, world.state.encode(), world.score,
+                         player.x, player.y, player.vy, world.camera_x,
+                         player.on_ground, player.jumps_left))
+    h.update(np.array(sorted(world.collected), np.int64).tobytes())
+    for kind in ENEMY_KINDS:
+        group = world.enemy_engine.groups[kind]
+        for name, _ in group.FIELDS + group.EXTRA_FIELDS:
+            h.update(getattr(group, name)[:group.n].tobytes())
+        h.update(np.array(sorted(group.killed), np.int64).tobytes())
+    return h.digest()
+
+
+class Recording:
+    """Inputs de uma partida, tick a tick, com o que é preciso para reproduzi-la."""
+
+    def __init__(self, seed=0, sim_hz=SIM_HZ, streaming=True, level_digest=""):
+        self.seed = seed
+        self.sim_hz = sim_hz
+        self.streaming = streaming
+        self.level_digest = level_digest
+        self.ticks = bytearray()
+        self.checksum = None
+
+    @classmethod
+    def of(cls, world):
+        """Uma gravação vazia para a partida que o world acabou de começar."""
+        return cls(world.seed, round(world.sim_hz), world.streamer.enabled,
+                   world.level.digest)
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def record(self, inputs):
+        self.ticks.append(pack_inputs(inputs))
+
+    def record_respawn(self):
+        self.ticks.append(RESPAWN)
+
+    def finish(self, world):
+        """Guarda o checksum do estado em que a partida está agora."""
+        self.checksum = state_checksum(world)
+
+    def inputs(self):
+        """Os Inputs gravados, um por tick (None onde houve respawn)."""
+        return [unpack_inputs(byte) for byte in self.ticks]
+
+    def save(self, path=None):
+        """Grava o log binário e devolve o caminho."""
+        if path is None:
+            path = time.strftime("replay_%Y%m%d_%H%M%S.pxr")
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, STREAMING if self.streaming else 0,
+                             self.sim_hz, self.seed, bytes.fromhex(self.level_digest),
+                             len(self.ticks), self.checksum or bytes(8))
+        with open(path, "wb") as f:
+            f.write(header + zlib.compress(bytes(self.ticks), 9))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size or data[:4] != MAGIC:
+            raise ReplayError(f"{path}: não é um arquivo de replay")
+        magic, version, flags, sim_hz, seed, digest, ticks, checksum = HEADER.unpack_from(data)
+        if version != FORMAT_VERSION:
+            raise ReplayError(f"{path}: versão {version} do formato não suportada")
+        recording = cls(seed, sim_hz, bool(flags & STREAMING), digest.hex())
+        try:
+            recording.ticks = bytearray(zlib.decompress(data[HEADER.size:]))
+        except zlib.error as e:
+            raise ReplayError(f"{path}: corpo corrompido ({e})") from None
+        if len(recording.ticks) != ticks:
+            raise ReplayError(f"{path}: {len(recording.ticks)} ticks no corpo, {ticks} no cabeçalho")
+        recording.checksum = checksum if any(checksum) else None
+        return recording
+
+
+class ReplayFeed:
+    """Entrega os Inputs de uma gravação, um por tick, no lugar do teclado."""
+
+    def __init__(self, recording):
+        self.recording = recording
+        self.position = 0
+
+    @property
+    def done(self):
+        return self.position >= len(self.recording.ticks)
+
+    def next(self):
+        byte = self.recording.ticks[self.position]
+        self.position += 1
+        return unpack_inputs(byte)
+
+
+def check_level(recording, level):
+    if recording.level_digest != level.digest:
+        raise ReplayError(f"o replay foi gravado em outra fase (hash {recording.level_digest[:12]}…, "
+                          f"a fase {level.name!r} tem {level.digest[:12]}…)")
+
+
+def level_for(recording, level=None):
+    """
+    A fase da gravação: a infinita, se ela foi gravada no modo infinito (a
+    fase vem da semente), level, se for ela, ou a fase da campanha com o
+    mesmo hash. Sem nenhuma que bata, level (a fase padrão, se não vier
+    nenhuma), para check_level reclamar.
+    """
+    endless = EndlessLevel(recording.seed)
+    if recording.level_digest == endless.digest:
+        return endless
+    if level is not None and level.digest == recording.level_digest:
+        return level
+    for path in campaign_paths():
+        candidate = load_level(path)
+        if candidate.digest == recording.level_digest:
+            return candidate
+    return level or load_level()
+
+
+def replay(recording, level=None):
+    """
+    Roda a gravação sem janela, o mais rápido possível, e devolve o World
+    no estado final.
+    """
+    level = level_for(recording, level)
+    check_level(recording, level)
+    world = World(level, streaming=recording.streaming, sim_hz=recording.sim_hz)
+    world.reset(recording.seed)
+    step = world.step
+    # Na fase infinita as seções são geradas sob demanda; aqui só são
+    # descartadas as que ficaram para trás (orçamento zero)
+    endless = isinstance(level, EndlessLevel)
+    for inputs in recording.inputs():
+        if inputs is None:
+            world.respawn()
+        else:
+            step(inputs)
+        if endless:
+            level.advance(world.camera_x, 0)
+    return world
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproduz uma partida gravada do Pixel Dash.")
+    parser.add_argument("path", help="arquivo .pxr")
+    parser.add_argument("--level", help="fase em que a partida foi gravada (padrão: a da "
+                        "campanha com o mesmo hash)")
+    parser.add_argument("--realtime", action="store_true",
+                        help="assiste ao replay no jogo, em tempo real")
+    args = parser.parse_args()
+
+    try:
+        recording = Recording.load(args.path)
+    except (OSError, ReplayError) as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    if args.realtime:
+        env = dict(os.environ, PIXEL_DASH_REPLAY=os.path.abspath(args.path))
+        return subprocess.call([sys.executable, "-m", "pgzero",
+                                os.path.join(ROOT, "pixel_dash.py")], env=env)
+
+    start = time.perf_counter()
+    try:
+        world = replay(recording, load_level(args.level) if args.level else None)
+    except ReplayError as e:
+        print(e, file=sys.stderr)
+        return 2
+    elapsed = time.perf_counter() - start
+    ticks = len(recording)
+    print(f"{ticks} ticks ({ticks / recording.sim_hz:.1f} s de jogo) em {elapsed:.2f} s; "
+          f"estado final: {world.state}, score {world.score}, x {world.player.x:.1f}")
+    if recording.checksum is None:
+        print("Replay sem checksum gravado; nada a conferir.")
+        return 0
+    if state_checksum(world) != recording.checksum:
+        print("DIVERGÊNCIA: o estado final não bate com o checksum gravado.", file=sys.stderr)
+        return 1
+    print("Checksum ok.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
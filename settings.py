@@ -0,0 +1,19 @@
+"""Constantes do Pixel Dash, compartilhadas pela simulação e pelo pgzero."""
+
+# Configurações
+WIDTH = 800
+HEIGHT = 600
+
+# Física e Gameplay
+GRAVITY = 0.6
+PLAYER_SPEED = 4
+JUMP_POWER = 12
+LEVEL_LENGTH = 8000
+
+# Passo fixo da simulação. As constantes acima valem por tick a BASE_HZ;
+# com outro SIM_HZ o World escala tudo para a velocidade do jogo não mudar,
+# e a gravidade é somada de forma fechada para o arco do pulo também não.
+BASE_HZ = 60
+SIM_HZ = 60
+# Máximo de ticks por frame quando a renderização atrasa
+MAX_SUBSTEPS = 5
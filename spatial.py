@@ -0,0 +1,80 @@
+"""
+Broadphase de colisão: grade uniforme (spatial hash) sobre o nível.
+Cada entrada ocupa todas as células que o seu retângulo toca; uma consulta
+devolve só o que está nas células vizinhas, ordenado pela chave de ordem de
+cada entrada (por padrão, a ordem de inserção), para que as colisões sejam
+resolvidas na mesma ordem das listas originais.
+"""
+from operator import itemgetter
+
+CELL_SIZE = 128
+
+
+class SpatialHash:
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entries = {}
+        self._seq = 0
+
+    def clear(self):
+        self.cells.clear()
+        self.entries.clear()
+        self._seq = 0
+
+    def _cell_range(self, box):
+        size = self.cell_size
+        return (int(box.left // size), int(box.top // size),
+                int((box.left + box.width) // size), int((box.top + box.height) // size))
+
+    def _link(self, entry, cell_range):
+        cells = self.cells
+        key = id(entry[2])
+        cx0, cy0, cx1, cy1 = cell_range
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    bucket = cells[(cx, cy)] = {}
+                bucket[key] = entry
+
+    def _unlink(self, entry):
+        cells = self.cells
+        key = id(entry[2])
+        cx0, cy0, cx1, cy1 = entry[4]
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = cells[(cx, cy)]
+                del bucket[key]
+                if not bucket:
+                    del cells[(cx, cy)]
+
+    def insert(self, item, kind, box, order=None):
+        """
+        Registra item (do tipo kind) usando os limites de box. order define
+        a posição do item nas consultas; sem ele, vale a ordem de inserção.
+        """
+        cell_range = self._cell_range(box)
+        if order is None:
+            order = self._seq
+        entry = [order, kind, item, box, cell_range]
+        self._seq += 1
+        self.entries[id(item)] = entry
+        self._link(entry, cell_range)
+
+    def remove(self, item):
+        entry = self.entries.pop(id(item), None)
+        if entry is not None:
+            self._unlink(entry)
+
+    def query(self, left, top, right, bottom):
+        """Devolve [(kind, item), ...] das células que tocam o retângulo."""
+        size = self.cell_size
+        cells = self.cells
+        found = {}
+        for cx in range(int(left // size), int(right // size) + 1):
+            for cy in range(int(top // size), int(bottom // size) + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return [(entry[1], entry[2]) for entry in sorted(found.values(), key=itemgetter(0))]
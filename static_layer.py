@@ -0,0 +1,88 @@
+"""
+Camada estática do nível pré-renderizada em pedaços (chunks).
+Chão, blocos e espinhos nunca se movem, então são desenhados uma vez em
+superfícies de CHUNK_WIDTH px de largura; a cada frame só os 1-2 chunks que
+cruzam a câmera são blitados. Os chunks ficam num cache LRU e os sprites de
+cada um só são buscados na fase quando ele é assado, então a memória não
+cresce com o tamanho do nível.
+"""
+from collections import OrderedDict
+
+import pygame
+
+CHUNK_WIDTH = 1024
+MAX_CHUNKS = 4
+# Largura máxima de um sprite estático: quanto um sprite à esquerda do chunk
+# ainda pode invadir nele
+SPRITE_REACH = 128
+
+
+class StaticLayer:
+    def __init__(self, load_image, width, height, ground_y,
+                 chunk_width=CHUNK_WIDTH, max_chunks=MAX_CHUNKS):
+        self.load_image = load_image
+        self.width = width
+        self.height = height
+        self.ground_y = ground_y
+        self.chunk_width = chunk_width
+        self.max_chunks = max_chunks
+        self.sprites = None
+        self.chunks = OrderedDict()
+        self.bakes = 0
+        self.level = None
+
+    def build(self, sprites, camera_x=0):
+        """
+        Troca a fonte dos sprites estáticos e já assa os chunks da câmera
+        inicial. sprites(lo, hi) devolve (imagem, x, y) com x em [lo, hi).
+        """
+        self.sprites = sprites
+        self.chunks.clear()
+        for idx in self.visible_chunks(camera_x):
+            self.chunk(idx)
+
+    def visible_chunks(self, camera_x):
+        cw = self.chunk_width
+        return range(int(camera_x // cw), int((camera_x + self.width) // cw) + 1)
+
+    def chunk(self, idx):
+        """(superfície, topo) do chunk idx."""
+        baked = self.chunks.get(idx)
+        if baked is not None:
+            self.chunks.move_to_end(idx)
+            return baked
+        baked = self.chunks[idx] = self.bake(idx)
+        if len(self.chunks) > self.max_chunks:
+            self.chunks.popitem(last=False)
+        return baked
+
+    def bake(self, idx):
+        cw = self.chunk_width
+        origin = idx * cw
+        load_image = self.load_image
+        # Mesmo deslocamento do draw_game: o x do centro vira o canto esquerdo
+        sprites = [(load_image(image), x, y)
+                   for image, x, y in self.sprites(origin - SPRITE_REACH, origin + cw)]
+        sprites = [s for s in sprites if s[1] + s[0].get_width() > origin]
+        # Só a faixa vertical que tem conteúdo estático, para o blit ser menor
+        top = max(0, min([self.ground_y] + [int(y) for _, _, y in sprites]))
+        surface = pygame.Surface((cw, self.height - top), pygame.SRCALPHA)
+
+        # Chão infinito: os tiles que cruzam este chunk
+        tile = load_image("ground")
+        tw = tile.get_width()
+        for i in range(origin // tw - 1, (origin + cw) // tw + 1):
+            surface.blit(tile, (i * tw - origin, self.ground_y - top))
+
+        for image, x, y in sprites:
+            surface.blit(image, (x - origin, y - top))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        self.bakes += 1
+        return surface, top
+
+    def draw(self, target, camera_x):
+        cw = self.chunk_width
+        for idx in self.visible_chunks(camera_x):
+            surface, top = self.chunk(idx)
+            target.blit(surface, (idx * cw - camera_x, top))
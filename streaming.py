@@ -0,0 +1,106 @@
+"""
+Streaming da fase em chunks de largura fixa, guiado pela câmera.
+
+Cada chunk está descarregado, carregado (dormindo) ou ativo. Ativos são os
+que cruzam a tela mais ACTIVE_MARGIN px: só os inimigos deles são simulados.
+Carregados são os que estão a até LOAD_MARGIN px: suas entidades existem,
+mas ficam paradas. O resto não ocupa memória nenhuma além dos arrays da fase.
+
+Para um chunk sair de um estado a câmera precisa se afastar HYSTERESIS px a
+mais do que para ele entrar, então andar para lá e para cá na borda não
+carrega e descarrega o mesmo chunk a cada frame. As duas faixas são
+contíguas, então o estado inteiro cabe em dois intervalos de índices.
+"""
+INF = float("inf")
+
+STREAM_CHUNK = 512
+ACTIVE_MARGIN = 256
+LOAD_MARGIN = 1024
+HYSTERESIS = 256
+
+
+def _clamp(value, lo, hi):
+    return min(max(value, lo), hi)
+
+
+def _minus(a, b):
+    """Intervalos de chunks que estão em a e não em b (até dois)."""
+    if a is None:
+        return []
+    first, last = a
+    if b is None or b[1] < first or b[0] > last:
+        return [a]
+    parts = []
+    if first < b[0]:
+        parts.append((first, b[0] - 1))
+    if last > b[1]:
+        parts.append((b[1] + 1, last))
+    return parts
+
+
+class ChunkStreamer:
+    """
+    Decide que chunks carregar, ativar e descarregar para cada camera_x.
+    Desligado (enabled=False), carrega a fase inteira de uma vez e mantém
+    tudo ativo, como se não houvesse streaming.
+    """
+
+    def __init__(self, view_width, chunk_width=STREAM_CHUNK, active_margin=ACTIVE_MARGIN,
+                 load_margin=LOAD_MARGIN, hysteresis=HYSTERESIS, enabled=True):
+        # Tudo que está ativo precisa continuar carregado
+        assert active_margin + hysteresis <= load_margin
+        self.view_width = view_width
+        self.chunk_width = chunk_width
+        self.active_margin = active_margin
+        self.load_margin = load_margin
+        self.hysteresis = hysteresis
+        self.enabled = enabled
+        self.active = None
+        self.loaded = None
+
+    def reset(self):
+        self.active = None
+        self.loaded = None
+
+    @staticmethod
+    def minus(a, b):
+        """Intervalos de chunks que estão em a e não em b."""
+        return _minus(a, b)
+
+    def chunk_of(self, x):
+        return int(x // self.chunk_width) if self.enabled else 0
+
+    def bounds(self, span):
+        """Intervalo [lo, hi) em px coberto por um intervalo de chunks."""
+        if not self.enabled:
+            return -INF, INF
+        cw = self.chunk_width
+        return span[0] * cw, (span[1] + 1) * cw
+
+    def _span(self, camera_x, margin):
+        cw = self.chunk_width
+        return int((camera_x - margin) // cw), int((camera_x + self.view_width + margin) // cw)
+
+    def _follow(self, current, camera_x, margin):
+        enter_lo, enter_hi = self._span(camera_x, margin)
+        if current is None:
+            return enter_lo, enter_hi
+        exit_lo, exit_hi = self._span(camera_x, margin + self.hysteresis)
+        return _clamp(current[0], exit_lo, enter_lo), _clamp(current[1], enter_hi, exit_hi)
+
+    def update(self, camera_x):
+        """
+        Atualiza as faixas e devolve (a carregar, a descarregar), cada uma
+        uma lista de intervalos (primeiro, último) de chunks.
+        """
+        old = self.loaded
+        if not self.enabled:
+            if old is not None:
+                return [], []
+            self.active = self.loaded = (0, 0)
+            return [self.loaded], []
+        self.active = self._follow(self.active, camera_x, self.active_margin)
+        self.loaded = self._follow(old, camera_x, self.load_margin)
+        if self.loaded == old:
+            return [], []
+        return _minus(self.loaded, old), _minus(old, self.loaded)
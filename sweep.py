@@ -0,0 +1,44 @@
+"""
+Colisão contínua (swept AABB) para passos grandes de simulação.
+
+O teste de sobreposição do colliderect só olha onde o player termina o tick:
+com um dt grande ele atravessa uma plataforma fina ou passa por uma moeda,
+um espinho ou um inimigo sem nunca sobrepor. sweep() calcula o tempo de
+impacto de um retângulo que anda em linha reta durante o tick contra outro,
+pelo método das faixas (slabs) em cada eixo. Como no colliderect, encostar
+só na borda não conta.
+"""
+INF = float("inf")
+
+
+def _slab(start, size, delta, other_start, other_size):
+    """(entrada, saída) do eixo, em frações do tick; None se nunca se cruzam."""
+    if delta > 0:
+        return (other_start - (start + size)) / delta, (other_start + other_size - start) / delta
+    if delta < 0:
+        return (other_start + other_size - start) / delta, (other_start - (start + size)) / delta
+    if start + size <= other_start or start >= other_start + other_size:
+        return None
+    return -INF, INF
+
+
+def sweep(left, top, width, height, dx, dy, other_left, other_top, other_width, other_height):
+    """
+    Primeiro contato do retângulo (left, top, width, height), andando
+    (dx, dy) no tick, com o retângulo other parado: (t, eixo), com t em
+    (0, 1) e eixo 0 se o contato foi pelos lados ou 1 se foi por cima ou
+    por baixo. None se não se tocam ou se já começam sobrepostos (isso o
+    teste do tick anterior já viu). Para dois corpos em movimento, use o
+    deslocamento relativo.
+    """
+    x = _slab(left, width, dx, other_left, other_width)
+    if x is None:
+        return None
+    y = _slab(top, height, dy, other_top, other_height)
+    if y is None:
+        return None
+    enter = max(x[0], y[0])
+    leave = min(x[1], y[1])
+    if enter >= leave or enter >= 1.0 or enter < 0.0:
+        return None
+    return enter, int(y[0] > x[0])
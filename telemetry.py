@@ -0,0 +1,228 @@
+"""
+Telemetria de partidas: onde o player pula, pega moedas e morre.
+
+O World e o pixel_dash.py chamam record() nos pontos de interesse (pulo,
+moeda, stomp, morte, início e fim da partida). Cada evento vira um registro
+binário de tamanho fixo (RECORD, 32 bytes) escrito num ring buffer NumPy
+pré-alocado, campo a campo, sem criar objetos. Uma thread em segundo plano
+copia o que foi escrito para um arquivo só de acréscimo por fase,
+telemetry/<hash da fase>.ptl, a cada FLUSH_INTERVAL s ou quando o buffer
+passa da metade. O modo infinito, que tem uma fase por semente, grava
+todas as partidas em telemetry/endless-<versão do gerador>.ptl; ali o x
+é a distância percorrida e o uid de um inimigo só vale com a semente, que
+é o session do evento. Se o disco não acompanhar e o buffer encher, os eventos
+novos são descartados (dropped) em vez de travar o frame.
+
+Desligada (o padrão, e sempre sem begin()), record() volta na primeira linha.
+Os arquivos são lidos offline, com memmap, pelo agregador:
+
+    python telemetry.py                  # mapas de calor de telemetry/*.ptl
+    python telemetry.py --bin 200 --npz mapas.npz
+"""
+import argparse
+import atexit
+import glob
+import os
+import sys
+import threading
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TELEMETRY_DIR = os.path.join(ROOT, "telemetry")
+EXTENSION = ".ptl"
+CAPACITY = 4096
+FLUSH_INTERVAL = 1.0
+
+RECORD = np.dtype([("session", "<u8"), ("tick", "<u4"), ("kind", "u1"), ("subject", "u1"),
+                   ("reserved", "<u2"), ("uid", "<i4"), ("x", "<f4"), ("y", "<f4"),
+                   ("vy", "<f4")])
+
+# Tipos de evento
+START, PRESS, JUMP, COIN, STOMP, DEATH, END = range(7)
+KINDS = ("start", "press", "jump", "coin", "stomp", "death", "end")
+# subject: o que matou ou foi pisado; no END, como a partida terminou
+SUBJECTS = ("", "spikes", "walkers", "flyers", "jumpers", "swoopers")
+SUBJECT_IDS = {name: i for i, name in enumerate(SUBJECTS)}
+OUTCOMES = ("", "game_over", "complete")
+OUTCOME_IDS = {name: i for i, name in enumerate(OUTCOMES)}
+
+
+class Telemetry:
+    """Gravador de eventos com ring buffer e escrita em segundo plano."""
+
+    def __init__(self, directory=TELEMETRY_DIR, capacity=CAPACITY, interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self.enabled = False
+        self.session = 0
+        self.path = None
+        self.buffer = np.zeros(capacity, RECORD)
+        self.capacity = capacity
+        # Colunas do buffer, para record() escrever campo a campo
+        self._session = self.buffer["session"]
+        self._tick = self.buffer["tick"]
+        self._kind = self.buffer["kind"]
+        self._subject = self.buffer["subject"]
+        self._uid = self.buffer["uid"]
+        self._x = self.buffer["x"]
+        self._y = self.buffer["y"]
+        self._vy = self.buffer["vy"]
+        # Registros escritos e registros já no disco, contados desde o início
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+        self.written = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._closed = False
+
+    def begin(self, key, session):
+        """Liga a telemetria para uma partida nova, gravando em key.ptl (telemetry_key da fase)."""
+        path = os.path.join(self.directory, key + EXTENSION)
+        if path != self.path:
+            # O que está no buffer é da fase anterior
+            self.flush()
+            self.path = path
+        self.session = session
+        self.enabled = True
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def end(self):
+        self.enabled = False
+
+    def record(self, kind, tick, x, y, vy=0.0, subject=0, uid=-1):
+        """Acrescenta um evento ao buffer; não aloca nem espera a thread."""
+        if not self.enabled:
+            return
+        head = self.head
+        pending = head - self.tail
+        if pending >= self.capacity:
+            self.dropped += 1
+            return
+        i = head % self.capacity
+        self._session[i] = self.session
+        self._tick[i] = tick
+        self._kind[i] = kind
+        self._subject[i] = subject
+        self._uid[i] = uid
+        self._x[i] = x
+        self._y[i] = y
+        self._vy[i] = vy
+        # Só depois dos campos, para a thread nunca ver um registro pela metade
+        self.head = head + 1
+        if pending + 1 == self.capacity // 2:
+            self._wake.set()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Grava no arquivo da fase o que ainda não foi gravado."""
+        with self._lock:
+            tail = self.tail
+            head = self.head
+            if head == tail or self.path is None:
+                return
+            start = tail % self.capacity
+            end = start + (head - tail)
+            # O trecho pode dar a volta no fim do buffer
+            chunks = [self.buffer[start:min(end, self.capacity)]]
+            if end > self.capacity:
+                chunks.append(self.buffer[:end - self.capacity])
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(self.path, "ab") as f:
+                    for chunk in chunks:
+                        f.write(chunk.data)
+            except OSError:
+                print("WARNING: could not write telemetry.")
+            self.written += head - tail
+            self.tail = head
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.enabled = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        self.flush()
+
+
+def load(path):
+    """Os registros de um arquivo .ptl, mapeados do disco sem copiar."""
+    count = os.path.getsize(path) // RECORD.itemsize
+    if not count:
+        return np.zeros(0, RECORD)
+    # Um registro pela metade no fim (processo morto no meio da escrita) fica de fora
+    return np.memmap(path, RECORD, mode="r", shape=(count,))
+
+
+def heatmaps(records, bin_width=100):
+    """
+    {tipo: contagem por faixa de bin_width px de x} para mortes, pulos,
+    apertos de pulo, moedas e stomps; todas com o mesmo número de faixas.
+    """
+    kinds = {"death": DEATH, "jump": JUMP, "press": PRESS, "coin": COIN, "stomp": STOMP}
+    bins = np.floor_divide(np.maximum(records["x"], 0), bin_width).astype(np.int64)
+    size = int(bins.max()) + 1 if len(bins) else 0
+    kind = records["kind"]
+    return {name: np.bincount(bins[kind == k], minlength=size) for name, k in kinds.items()}
+
+
+def killers(records, top=10):
+    """[(tipo, uid, x médio, mortes)] do que mais matou, em ordem decrescente."""
+    deaths = records[records["kind"] == DEATH]
+    if not len(deaths):
+        return []
+    keys = deaths["subject"].astype(np.int64) << 32 | (deaths["uid"].astype(np.int64) & 0xFFFFFFFF)
+    unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    mean_x = np.bincount(inverse, weights=deaths["x"]) / counts
+    order = np.argsort(-counts, kind="stable")[:top]
+    return [(SUBJECTS[int(unique[i] >> 32)], int(np.int32(unique[i] & 0xFFFFFFFF)),
+             float(mean_x[i]), int(counts[i])) for i in order]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mapas de calor da telemetria do Pixel Dash.")
+    parser.add_argument("paths", nargs="*", help=f"arquivos {EXTENSION} (padrão: telemetry/*{EXTENSION})")
+    parser.add_argument("--bin", type=int, default=100, help="largura de cada faixa de x, em px")
+    parser.add_argument("--npz", help="salva os mapas de calor neste arquivo")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob(os.path.join(TELEMETRY_DIR, "*" + EXTENSION)))
+    if not paths:
+        print("Nenhum arquivo de telemetria.", file=sys.stderr)
+        return 1
+    saved = {}
+    for path in paths:
+        records = load(path)
+        name = os.path.splitext(os.path.basename(path))[0]
+        sessions = len(np.unique(records["session"][records["kind"] == START]))
+        print(f"{name[:12]}: {len(records)} eventos, {sessions} partidas")
+        maps = heatmaps(records, args.bin)
+        print(f"{'x':>12}" + "".join(f"{kind:>8}" for kind in maps))
+        for i, row in enumerate(zip(*maps.values())):
+            if any(row):
+                print(f"{i * args.bin:>6}-{(i + 1) * args.bin:<5}" + "".join(f"{n:>8}" for n in row))
+        # No modo infinito o mesmo uid é um inimigo diferente em cada semente
+        if not name.startswith("endless-"):
+            for subject, uid, x, count in killers(records):
+                print(f"  {count:>6} mortes: {subject} #{uid} (x≈{x:.0f})")
+        saved.update({f"{name}_{kind}": counts for kind, counts in maps.items()})
+    if args.npz:
+        np.savez(args.npz, bin_width=args.bin, **saved)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+import json
+import os
+import sys
+
+import pytest
+
+# Os módulos do jogo ficam na raiz do repositório, sem pacote
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from level_loader import DEFAULT_LEVEL, level_from_spec  # noqa: E402
+
+
+@pytest.fixture
+def checkpoint_spec():
+    """A fase padrão com um checkpoint a cada 250 px, para as mortes virarem respawns."""
+    with open(DEFAULT_LEVEL) as f:
+        spec = json.load(f)
+    spec["checkpoints"] = list(range(300, 8000, 250))
+    return spec
+
+
+@pytest.fixture
+def checkpoint_level(checkpoint_spec):
+    return level_from_spec(checkpoint_spec)
@@ -0,0 +1,76 @@
+"""Modo infinito: os uids de seções descartadas não se acumulam."""
+from procgen import SECTION_UIDS, SECTION_WIDTH, EndlessLevel
+from world import Inputs, World
+
+RIGHT = Inputs(False, True, 0)
+
+
+def fly(world, ticks, inputs=RIGHT):
+    """
+    Anda voando por cima da fase, pegando cada moeda e derrotando cada
+    inimigo carregado. Devolve quantos uids os conjuntos guardavam a cada
+    tick e quantos uids foram coletados ou derrotados no total.
+    """
+    player = world.player
+    groups = world.enemy_engine.groups.values()
+    sizes = []
+    seen = set()
+    for _ in range(ticks):
+        player.y = 0
+        player.vy = 0
+        world.collected.update(world.coin_uids.values())
+        seen.update(("coins", uid) for uid in world.coin_uids.values())
+        for kind, group in world.enemy_engine.groups.items():
+            for i in range(group.n):
+                if group.alive[i]:
+                    seen.add((kind, int(group.uid[i])))
+                    group.kill(i)
+        world.step(inputs)
+        world.level.advance(world.camera_x, 0)
+        sizes.append(len(world.collected) + sum(len(group.killed) for group in groups))
+    return sizes, len(seen)
+
+
+def test_forgets_uids_of_retired_sections():
+    world = World(EndlessLevel(5))
+    world.reset(5)
+    sizes, seen = fly(world, 20000)
+    floor = world.uid_floor
+    assert floor >= 10 * SECTION_UIDS
+    assert min(world.collected) >= floor
+    for group in world.enemy_engine.groups.values():
+        assert group.uid_floor == floor
+        assert all(uid >= floor for uid in group.killed)
+    # Limitado pelas seções vivas, não pela distância percorrida
+    assert max(sizes) < seen / 4
+
+
+def test_retired_sections_come_back_empty():
+    world = World(EndlessLevel(5))
+    world.reset(5)
+    fly(world, 4000)
+    floor = world.uid_floor
+    assert floor
+    # De volta a uma seção já descartada: blocos sim, moedas e inimigos não
+    x = world.player.x
+    world.player.x = (floor // SECTION_UIDS - 1) * SECTION_WIDTH + SECTION_WIDTH / 2
+    fly(world, 1, Inputs(False, False, 0))
+    assert world.level_blocks
+    assert all(uid >= floor for uid in world.coin_uids.values())
+    for group in world.enemy_engine.groups.values():
+        assert all(uid >= floor for uid in group.uid[:group.n])
+    assert world.uid_floor == floor
+    assert x > world.player.x
+
+
+def test_restore_brings_back_the_floor():
+    world = World(EndlessLevel(8))
+    world.reset(8)
+    fly(world, 1500)
+    snap = world.snapshot()
+    fly(world, 3000)
+    assert world.uid_floor > snap.uid_floor
+    world.restore(snap)
+    assert world.uid_floor == snap.uid_floor
+    for group in world.enemy_engine.groups.values():
+        assert group.uid_floor == snap.uid_floor
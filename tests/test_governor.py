@@ -0,0 +1,48 @@
+"""QualityGovernor: degradações por p90 e o placar segurado pela degradação "hud"."""
+from governor import CHECK_EVERY, DEGRADATIONS, FRAME_BUDGET, HUD_INTERVAL, QualityGovernor
+
+
+def played(governor, frames, seconds=FRAME_BUDGET * 0.5):
+    """Joga frames frames; o padrão fica entre LOW e HIGH e não muda o nível."""
+    for _ in range(frames):
+        governor.frame(seconds)
+
+
+def test_slow_frames_turn_degradations_on_and_fast_ones_off():
+    governor = QualityGovernor(window=CHECK_EVERY, cooldown=CHECK_EVERY)
+    played(governor, CHECK_EVERY * 4, seconds=1.0)
+    assert governor.active_set == frozenset(DEGRADATIONS[:governor.level])
+    assert governor.active("animations")
+    level = governor.level
+    played(governor, CHECK_EVERY * 4, seconds=0.0)
+    assert governor.level < level
+
+
+def test_hud_holds_the_score_for_hud_interval_frames():
+    governor = QualityGovernor()
+    governor.set_level(DEGRADATIONS.index("hud") + 1)
+    assert governor.hud(1) == 1
+    played(governor, HUD_INTERVAL - 1)
+    assert governor.hud(2) == 1
+    played(governor, 1)
+    assert governor.hud(3) == 3
+
+
+def test_hud_follows_the_score_without_the_degradation():
+    governor = QualityGovernor()
+    assert governor.hud(1) == 1
+    assert governor.hud(2) == 2
+
+
+def test_reset_drops_the_score_of_the_last_run():
+    # Ao recomeçar, frames volta a 0: o placar segurado da partida anterior
+    # não pode ficar na tela esperando HUD_INTERVAL frames de novo
+    governor = QualityGovernor()
+    governor.set_level(DEGRADATIONS.index("hud") + 1)
+    played(governor, 100)
+    assert governor.hud(42) == 42
+    played(governor, 3)
+    governor.reset()
+    assert governor.hud(0) == 0
+    played(governor, HUD_INTERVAL - 1)
+    assert governor.hud(5) == 0
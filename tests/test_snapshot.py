@@ -0,0 +1,76 @@
+"""snapshot() e restore(): continuar de um snapshot dá a mesma partida."""
+import random
+
+import pytest
+
+from replay import state_checksum
+from world import Inputs, World
+
+
+def random_inputs(seed, ticks):
+    rnd = random.Random(seed)
+    inputs = []
+    right = True
+    for tick in range(ticks):
+        if tick % 30 == 0:
+            right = rnd.random() < 0.85
+        inputs.append(Inputs(not right, right, int(rnd.random() < 0.08)))
+    return inputs
+
+
+def run(world, inputs):
+    """
+    Checksum do estado depois de cada tick. Uma morte gasta o tick seguinte
+    no respawn, que também passa por restore().
+    """
+    checksums = []
+    for tick_inputs in inputs:
+        if world.state == "game_over":
+            world.respawn()
+        else:
+            world.step(tick_inputs)
+        checksums.append(state_checksum(world))
+    return checksums
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+@pytest.mark.parametrize("sim_hz", [60, 30])
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_restore_continues_identically(streaming, sim_hz, seed, checkpoint_level):
+    world = World(checkpoint_level, streaming=streaming, sim_hz=sim_hz)
+    world.reset(seed)
+    inputs = random_inputs(seed, 1500)
+    rnd = random.Random(seed)
+    ticks = sorted(rnd.sample(range(len(inputs)), 4))
+
+    snapshots = {}
+    expected = []
+    done = 0
+    for tick in ticks:
+        expected += run(world, inputs[done:tick])
+        done = tick
+        # O checkpoint fica fora do snapshot; volta junto para o respawn bater
+        snapshots[tick] = world.snapshot(), world.checkpoint
+    expected += run(world, inputs[done:])
+
+    # Do fim da partida de volta a cada snapshot, em ordem embaralhada, para
+    # restore() ter de carregar e soltar chunks nos dois sentidos
+    rnd.shuffle(ticks)
+    for tick in ticks:
+        snap, world.checkpoint = snapshots[tick]
+        world.restore(snap)
+        assert world.tick == snap.tick
+        assert run(world, inputs[tick:]) == expected[tick:]
+
+
+def test_same_snapshot_restores_twice(checkpoint_level):
+    # restore() não pode deixar o World apontando para os arrays do snapshot
+    world = World(checkpoint_level)
+    world.reset(4)
+    inputs = random_inputs(4, 900)
+    run(world, inputs[:300])
+    snap = world.snapshot()
+    expected = run(world, inputs[300:])
+    for _ in range(2):
+        world.restore(snap)
+        assert run(world, inputs[300:]) == expected
@@ -0,0 +1,101 @@
+"""Colisão contínua: com passos grandes nada atravessa plataformas finas, moedas ou inimigos."""
+import pytest
+
+from entities import ground_top_y, sprite_size
+from level_loader import level_from_spec
+from sweep import sweep
+from settings import BASE_HZ
+from world import Inputs, World
+
+COARSE_HZ = [60, 30, 20, 10]
+
+
+def world_of(sim_hz, **spec):
+    """Uma fase de teste com uma platform_small 200 px acima do chão."""
+    level = {"name": "teste", "length": 3000, "start": [400, 100],
+             "blocks": [{"image": "platform_small", "x": 400, "dy": -200}]}
+    level.update(spec)
+    world = World(level_from_spec(level), streaming=False, sim_hz=sim_hz)
+    world.reset(0)
+    return world
+
+
+def run(world, seconds):
+    for _ in range(round(seconds * world.sim_hz)):
+        world.step()
+        if world.state != "playing":
+            break
+
+
+def test_sweep_time_of_impact():
+    # 10 px de distância, andando 40 px: toca em 1/4 do tick, pelo lado
+    assert sweep(0, 0, 10, 10, 40, 0, 20, 0, 10, 10) == (0.25, 0)
+    assert sweep(0, 0, 10, 10, 0, 40, 0, 20, 10, 10) == (0.25, 1)
+    # Não alcança, passa ao lado, ou já começa sobreposto
+    assert sweep(0, 0, 10, 10, 5, 0, 20, 0, 10, 10) is None
+    assert sweep(0, 0, 10, 10, 40, 0, 20, 10, 10, 10) is None
+    assert sweep(0, 0, 10, 10, 40, 0, 5, 0, 10, 10) is None
+
+
+@pytest.mark.parametrize("sim_hz", COARSE_HZ)
+def test_lands_on_thin_platform(sim_hz):
+    world = world_of(sim_hz)
+    run(world, 3)
+    player = world.player
+    platform_top = ground_top_y() - 200 - sprite_size("platform_small")[1] / 2
+    assert player.bottom == platform_top
+    assert player.on_ground
+
+
+@pytest.mark.parametrize("sim_hz", COARSE_HZ)
+def test_collects_coins_in_fast_fall(sim_hz):
+    coins = [{"x": 400, "y": y} for y in range(150, 360, 30)]
+    world = world_of(sim_hz, coins=coins)
+    run(world, 3)
+    assert world.score == len(coins)
+
+
+@pytest.mark.parametrize("sim_hz", COARSE_HZ)
+@pytest.mark.parametrize("x, speed", [(607, 10), (614, 10), (635, 12), (663, 12)])
+def test_fast_enemy_hits_standing_player(sim_hz, x, speed):
+    # Parado no chão, o player não anda no tick: quem atravessa é o inimigo
+    y = ground_top_y() - sprite_size("hero_idle_1")[1] / 2
+    flyer = {"x": x, "y": y, "patrol": [-5000, 5000], "dir": -1, "speed": speed}
+    world = world_of(sim_hz, start=[400, y], enemies={"flyers": [flyer]})
+    run(world, 3)
+    assert world.state == "game_over"
+
+
+def jump_path(sim_hz, x, dy, double):
+    """
+    Corre para a direita e pula no tick 0 (e de novo no tick 12 de BASE_HZ se
+    double), com uma platform_small em x, dy. Devolve {tick de BASE_HZ: (x, y,
+    on_ground)} no fim de cada step.
+    """
+    world = world_of(sim_hz, start=[150, ground_top_y() - 12],
+                     blocks=[{"image": "platform_small", "x": x, "dy": dy}])
+    step = BASE_HZ // sim_hz
+    path = {}
+    for tick in range(0, 2 * BASE_HZ, step):
+        world.step(Inputs(False, True, int(tick == 0 or double and tick == 12)))
+        player = world.player
+        path[tick + step] = (player.x, player.y, player.on_ground)
+    return path
+
+
+@pytest.mark.parametrize("sim_hz", COARSE_HZ[1:])
+@pytest.mark.parametrize("double, dy", [(False, -55), (False, -100), (True, -145), (True, -190)])
+def test_reaches_the_same_platforms(sim_hz, double, dy):
+    # A plataforma tem 18 px e o player anda até 24 px num step: o pouso e a
+    # queda pela beirada têm de acontecer nos mesmos ticks de BASE_HZ que a 60 Hz
+    platform_top = ground_top_y() + dy - sprite_size("platform_small")[1] / 2
+    reached = 0
+    for x in range(160, 420, 12):
+        reference = jump_path(BASE_HZ, x, dy, double)
+        reached += any(on_ground and y + 12 == platform_top
+                       for _, y, on_ground in reference.values())
+        for tick, (px, py, on_ground) in jump_path(sim_hz, x, dy, double).items():
+            rx, ry, r_on_ground = reference[tick]
+            assert (px, on_ground) == (rx, r_on_ground), (x, tick)
+            assert py == pytest.approx(ry, abs=1e-9), (x, tick)
+    assert reached
@@ -0,0 +1,84 @@
+"""Passo fixo: com outro SIM_HZ a partida segue a mesma curva da de 60 Hz."""
+import pytest
+
+from entities import ground_top_y, sprite_size
+from level_loader import level_from_spec
+from settings import BASE_HZ
+from world import Inputs, World
+
+# Taxas em que cada tick é um número inteiro de ticks de BASE_HZ
+RATES = [30, 20, 15, 10]
+# Instante (em ticks de BASE_HZ) do segundo pulo; múltiplo de todos os passos
+SECOND_JUMP = 12
+TICKS = 60
+
+
+def world_at(sim_hz, **spec):
+    level = {"name": "teste", "length": 3000,
+             "start": [150, ground_top_y() - sprite_size("hero_idle_1")[1] / 2],
+             "blocks": [{"image": "platform_small", "x": 2900, "dy": -200}]}
+    level.update(spec)
+    world = World(level_from_spec(level), streaming=False, sim_hz=sim_hz)
+    world.reset(0)
+    return world
+
+
+def jump(sim_hz, double):
+    """{instante em ticks de BASE_HZ: (x, y, no chão)} de um pulo correndo para a direita."""
+    world = world_at(sim_hz)
+    player = world.player
+    step = BASE_HZ // sim_hz
+    path = {0: (player.x, player.y, player.on_ground)}
+    for tick in range(TICKS // step):
+        base = tick * step
+        presses = int(base == 0 or double and base == SECOND_JUMP)
+        world.step(Inputs(False, True, presses))
+        path[base + step] = (player.x, player.y, player.on_ground)
+    return path
+
+
+def apex(path):
+    return path[0][1] - min(y for _, y, _ in path.values())
+
+
+def test_jump_apex_at_60hz():
+    assert apex(jump(60, False)) == pytest.approx(114)
+    # O segundo pulo sai antes do ápice do primeiro (228 px só saindo nele)
+    assert apex(jump(60, True)) == pytest.approx(211.2)
+
+
+@pytest.mark.parametrize("sim_hz", RATES)
+@pytest.mark.parametrize("double", [False, True])
+def test_jump_follows_the_60hz_arc(sim_hz, double):
+    # Nos instantes em comum, posição e chão batem com os de 60 Hz, inclusive
+    # no ápice e depois de pousar
+    reference = jump(60, double)
+    path = jump(sim_hz, double)
+    for base, (x, y, on_ground) in path.items():
+        ref_x, ref_y, ref_on_ground = reference[base]
+        assert x == pytest.approx(ref_x, abs=1e-9)
+        assert y == pytest.approx(ref_y, abs=1e-9)
+        assert on_ground == ref_on_ground
+    assert path[TICKS][2]
+
+
+@pytest.mark.parametrize("sim_hz", RATES)
+def test_jumper_follows_the_60hz_arc(sim_hz):
+    y = ground_top_y() - 25
+    spec = {"enemies": {"jumpers": [{"x": 1000, "y": y}]}}
+
+    def arc(world):
+        group = world.enemy_engine.groups["jumpers"]
+        step = BASE_HZ // world.sim_hz
+        tops = {}
+        # Só o primeiro salto: o próximo começa no tick depois do pouso,
+        # que a taxas menores cai mais tarde dentro do passo
+        for tick in range(42 // step):
+            world.step()
+            tops[(tick + 1) * step] = float(group.top[0])
+        return tops
+
+    reference = arc(world_at(60, **spec))
+    for base, top in arc(world_at(sim_hz, **spec)).items():
+        assert top == pytest.approx(reference[base], abs=1e-9)
+    assert min(reference.values()) < y - 80
@@ -0,0 +1,52 @@
+"""
+Cache de textos já renderizados.
+Cada (texto, fonte, tamanho, cor) é rasterizado uma vez pelo mesmo ptext que
+o screen.draw.text usa, então o resultado é idêntico; os frames seguintes só
+blitam a superfície guardada. Textos que mudam (o placar) geram uma entrada
+nova por valor, e as menos usadas saem pelo LRU.
+"""
+from collections import OrderedDict
+
+from pgzero import ptext
+
+MAX_ENTRIES = 128
+
+# Âncoras aceitas em draw(), como no screen.draw.text: (horizontal, vertical)
+ANCHORS = {
+    "topleft": (0, 0), "midtop": (0.5, 0), "topright": (1, 0),
+    "midleft": (0, 0.5), "center": (0.5, 0.5), "midright": (1, 0.5),
+    "bottomleft": (0, 1), "midbottom": (0.5, 1), "bottomright": (1, 1),
+}
+
+
+class TextCache:
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def render(self, text, fontname, fontsize, color):
+        key = (text, fontname, fontsize, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.surfaces[key] = ptext.getsurf(text, fontname, fontsize, color=color,
+                                                     cache=False)
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def draw(self, target, text, fontname, fontsize, color, **anchor):
+        """Blita o texto em target; anchor é uma posição como center=(x, y)."""
+        (name, (x, y)), = anchor.items()
+        hanchor, vanchor = ANCHORS[name]
+        surface = self.render(text, fontname, fontsize, color)
+        target.blit(surface, (int(round(x - hanchor * surface.get_width())),
+                              int(round(y - vanchor * surface.get_height()))))
@@ -0,0 +1,36 @@
+"""
+Passo fixo da simulação, independente da taxa de quadros.
+O tempo real de cada frame entra num acumulador que é consumido em ticks de
+1/SIM_HZ s; a sobra (alpha, entre 0 e 1) diz quanto do próximo tick já
+passou, para o desenho interpolar entre os dois últimos estados.
+"""
+from settings import SIM_HZ, MAX_SUBSTEPS
+
+
+class FixedTimestep:
+    def __init__(self, hz=SIM_HZ, max_substeps=MAX_SUBSTEPS):
+        self.step = 1.0 / hz
+        self.max_substeps = max_substeps
+        self.accumulator = 0.0
+        # Ticks descartados pelo limite de recuperação
+        self.dropped = 0
+
+    def reset(self):
+        self.accumulator = 0.0
+
+    def advance(self, dt):
+        """Soma dt segundos e devolve quantos ticks simular agora."""
+        self.accumulator += dt
+        steps = int(self.accumulator // self.step)
+        if steps > self.max_substeps:
+            # Máquina lenta demais: o jogo desacelera em vez de travar tentando alcançar
+            self.dropped += steps - self.max_substeps
+            steps = self.max_substeps
+            self.accumulator %= self.step
+        else:
+            self.accumulator -= steps * self.step
+        return steps
+
+    @property
+    def alpha(self):
+        return min(max(self.accumulator / self.step, 0.0), 1.0)
@@ -0,0 +1,642 @@
+"""
+Núcleo da simulação do Pixel Dash.
+Não depende do pgzero nem de uma janela: o estado inteiro do jogo fica em
+um objeto World, avançado tick a tick por World.step(inputs).
+"""
+import random
+from collections import namedtuple
+
+from culling import DrawIndex
+from enemy_engine import EnemyEngine
+from entities import AnimationClock, Entity, Player, ground_top_y
+from level_loader import load_level
+from profiler import Profiler
+from settings import WIDTH, GRAVITY, PLAYER_SPEED, JUMP_POWER, LEVEL_LENGTH, BASE_HZ, SIM_HZ
+from spatial import SpatialHash
+from streaming import ChunkStreamer
+from sweep import sweep
+from telemetry import COIN, DEATH, JUMP, STOMP, SUBJECT_IDS, Telemetry
+
+# Folga em volta do caminho do player na consulta ao broadphase: cobre o
+# quanto os inimigos se movem dentro de um tick de BASE_HZ (cresce com dt
+# nos passos maiores), para a mesma lista de candidatos valer para
+# check_collisions() e hit_any_lethal_enemy().
+BROADPHASE_MARGIN = 64
+# Deslocamento do player no tick (px, em x ou em y) a partir do qual moedas,
+# espinhos e inimigos também são testados por colisão contínua. Abaixo disso
+# o teste de sobreposição do fim do tick só perde raspões de quina, e é com
+# ele que o jogo foi ajustado a 60 Hz; acima (passos grandes) o player
+# poderia atravessar um sprite de 18 px sem nunca sobrepor.
+SWEEP_MIN = 18
+
+# Entrada de um tick: esquerda/direita seguradas e quantos pulos foram
+# pressionados desde o tick anterior.
+Inputs = namedtuple("Inputs", ["left", "right", "jump"])
+NO_INPUT = Inputs(False, False, 0)
+
+# Estado mutável de uma partida, copiado por World.snapshot(). O que vem da
+# fase (blocos, espinhos, posições iniciais) não entra: continua nos arrays.
+Snapshot = namedtuple("Snapshot", [
+    "tick", "state", "score", "all_coins_collected", "camera_x", "player",
+    "clocks", "flag_image", "collected", "enemies", "streamed", "random",
+    "next_checkpoint", "uid_floor"])
+
+# Sprites
+player_frames = {
+    "idle": ["hero_idle_1", "hero_idle_2"],
+    "run": ["hero_idle_1", "hero_idle_2"],
+    "jump": ["hero_idle_1"]
+}
+flag_frames = ["flag_1", "flag_2"]
+coin_frames = ["coin_1", "coin_2"]
+
+ENEMY_KINDS = ("walkers", "flyers", "jumpers", "swoopers")
+
+# Tipos no índice de desenho. Blocos e espinhos vão assados na StaticLayer e
+# inimigos são culled pelo EnemyEngine; esses só entram no broadphase.
+DRAW_KINDS = ("coins", "flag")
+
+
+class World:
+    """
+    Estado completo de uma partida: player, inimigos, moedas, blocos,
+    câmera e pontuação. state vale "playing", "game_over" ou "complete".
+    Cada step() dura 1/sim_hz s; dt é essa duração em ticks de BASE_HZ.
+    Toda aleatoriedade da partida sai de self.random, semeado em reset(), para
+    a mesma semente e os mesmos Inputs reproduzirem a partida (replay.py).
+    """
+
+    def __init__(self, level=None, streaming=True, sim_hz=SIM_HZ, profiler=None, telemetry=None):
+        self.sim_hz = sim_hz
+        self.dt = BASE_HZ / sim_hz
+        # O movimento do player anda em passos de no máximo um tick de BASE_HZ
+        whole = int(self.dt)
+        self.substeps = (1.0,) * whole + ((self.dt - whole,) if self.dt > whole else ())
+        self.seed = 0
+        self.random = random.Random(0)
+        self.profiler = profiler or Profiler()
+        # Pulos, moedas, stomps e mortes; desligada a menos que alguém chame begin()
+        self.telemetry = telemetry or Telemetry()
+        self.player = Player("hero_idle_1", (150, 300))
+        self.flag_actor = Entity("flag_1", (LEVEL_LENGTH - 300, 0))
+        # Só as entidades dos chunks carregados pelo streaming
+        self.coins = []
+        self.level_blocks = []
+        # Inimigos móveis ficam em arrays por tipo; espinhos são Entities fixas
+        self.enemy_engine = EnemyEngine()
+        self.enemies = dict(self.enemy_engine.groups, spikes=[])
+        # Um relógio de animação por tipo, no lugar de timers por entidade.
+        # O do player avança um quadro por tick, alternando as duas poses.
+        self.clocks = {"player": AnimationClock(2, 1),
+                       "coins": AnimationClock(len(coin_frames), 10),
+                       "flag": AnimationClock(len(flag_frames), 15)}
+        self.animation_frames = {"coins": coin_frames, "flag": flag_frames}
+        # Tipos cujo relógio avança a cada tick; None é todos. Com o jogo
+        # pesado, o QualityGovernor restringe aos que estão na tela.
+        self.animated = None
+        for kind, group in self.enemy_engine.groups.items():
+            self.clocks[kind] = AnimationClock(len(group.frames), group.period)
+            self.animation_frames[kind] = group.frames
+        self.grid = SpatialHash()
+        self.draw_index = DrawIndex(DRAW_KINDS)
+        self.streamer = ChunkStreamer(WIDTH, enabled=streaming)
+        # chunk -> [(tipo, entidade)] carregadas nele; uid das moedas carregadas
+        self.chunk_entities = {}
+        self.coin_uids = {}
+        self.collected = set()
+        # Moedas com uid abaixo deste já contam como coletadas (forget_below)
+        self.uid_floor = 0
+        # Último checkpoint alcançado (um Snapshot) e o índice do próximo
+        self.checkpoint = None
+        self.next_checkpoint = 0
+        self.candidates = []
+        self.enemy_candidates = []
+        self.events = []
+        self.level = None
+        self.load_level(level or load_level())
+
+    def load_level(self, level):
+        """Troca de fase e reinicia a partida."""
+        self.level = level
+        self.flag_actor.pos = level.flag
+        self.reset()
+
+    def reset(self, seed=None):
+        """
+        Volta a partida ao início a partir dos arrays da fase. Sem seed, a
+        partida nova ganha uma semente sorteada.
+        """
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        self.random.seed(seed)
+        player = self.player
+        self.state = "playing"
+        self.score = 0
+        player.image = "hero_idle_1"
+        player.pos = self.level.start
+        player.vy = 0
+        player.on_ground = True
+        player.jumps_left = 2
+        self.camera_x = 0
+        self.remember()
+        self.all_coins_collected = False
+        for clock in self.clocks.values():
+            clock.reset()
+        self.flag_actor.image = flag_frames[0]
+        self.tick = 0
+        self.checkpoint = None
+        self.next_checkpoint = 0
+        self.uid_floor = 0
+
+        self.unload_all()
+        self.streamer.reset()
+        self.stream()
+
+    def remember(self):
+        """Guarda câmera e player do tick anterior, para interpolar o desenho."""
+        self.prev_camera_x = self.camera_x
+        self.prev_player = (self.player.x, self.player.y)
+
+    def interpolated(self, alpha):
+        """(camera_x, x do player, y do player) entre o tick anterior e o atual."""
+        if alpha == 1.0:
+            return self.camera_x, self.player.x, self.player.y
+        prev_camera_x = self.prev_camera_x
+        prev_x, prev_y = self.prev_player
+        player = self.player
+        return (prev_camera_x + (self.camera_x - prev_camera_x) * alpha,
+                prev_x + (player.x - prev_x) * alpha,
+                prev_y + (player.y - prev_y) * alpha)
+
+    def snapshot(self):
+        """
+        Copia só o estado mutável da partida: player, câmera, placar, relógios,
+        moedas coletadas, inimigos carregados e a faixa do streaming.
+        """
+        player = self.player
+        streamer = self.streamer
+        return Snapshot(
+            self.tick, self.state, self.score, self.all_coins_collected, self.camera_x,
+            (player.x, player.y, player.vy, player.on_ground, player.jumps_left, player.image),
+            tuple((clock.timer, clock.frame) for clock in self.clocks.values()),
+            self.flag_actor.image, frozenset(self.collected), self.enemy_engine.snapshot(),
+            (streamer.active, streamer.loaded), self.random.getstate(), self.next_checkpoint,
+            self.uid_floor)
+
+    def restore(self, snap):
+        """
+        Volta ao estado de snapshot() sem recriar a fase: blocos e espinhos
+        carregados ficam onde estão, só os chunks que diferem da faixa do
+        snapshot são carregados ou soltos, e as moedas coletadas depois dele
+        voltam (ou somem, se o snapshot é de mais adiante). O último
+        checkpoint não faz parte do snapshot: continua o mesmo.
+        """
+        player = self.player
+        self.tick = snap.tick
+        self.state = snap.state
+        self.score = snap.score
+        self.all_coins_collected = snap.all_coins_collected
+        self.camera_x = snap.camera_x
+        (player.x, player.y, player.vy, player.on_ground,
+         player.jumps_left, player.image) = snap.player
+        for clock, (timer, frame) in zip(self.clocks.values(), snap.clocks):
+            clock.timer = timer
+            clock.frame = frame
+        self.flag_actor.image = snap.flag_image
+        self.random.setstate(snap.random)
+        self.next_checkpoint = snap.next_checkpoint
+        self.uid_floor = snap.uid_floor
+
+        returned = self.collected - snap.collected
+        taken = snap.collected - self.collected
+        self.collected = set(snap.collected)
+        # Moedas que o snapshot já tinha coletado e que ainda estão carregadas
+        # (restore() para um ponto mais adiante na partida)
+        if taken:
+            coin_uids = self.coin_uids
+            for coin in [c for c in self.coins if coin_uids[id(c)] in taken]:
+                self.coins.remove(coin)
+                self.unregister(coin, "coins", coin)
+                del coin_uids[id(coin)]
+        streamer = self.streamer
+        old = streamer.loaded
+        streamer.active, streamer.loaded = snap.streamed
+        for first, last in streamer.minus(old, streamer.loaded):
+            self.unload_chunks(first, last)
+        for span in streamer.minus(streamer.loaded, old):
+            self.load_span(*streamer.bounds(span))
+        # Moedas coletadas depois do snapshot, em chunks que não foram recarregados
+        if returned:
+            coin = self.level.coin
+            loaded = set(self.coin_uids.values())
+            first, last = streamer.loaded
+            chunk_of = streamer.chunk_of
+            for uid in sorted(returned - loaded):
+                x, y = coin(uid)
+                if first <= chunk_of(x) <= last:
+                    self.add_coin(uid, x, y)
+
+        self.enemy_engine.restore(snap.enemies)
+        self.enemy_engine.set_windows(streamer.bounds(streamer.active),
+                                      streamer.bounds(streamer.loaded))
+        self.remember()
+
+    def respawn(self):
+        """Volta ao último checkpoint; False se nenhum foi alcançado."""
+        if self.checkpoint is None:
+            return False
+        self.restore(self.checkpoint)
+        return True
+
+    # LEVEL CREATION FUNCTIONS
+    def unload_all(self):
+        self.grid.clear()
+        self.draw_index.clear()
+        self.level_blocks.clear()
+        self.enemies["spikes"].clear()
+        self.coins.clear()
+        self.chunk_entities.clear()
+        self.coin_uids.clear()
+        self.collected.clear()
+        self.enemy_engine.clear()
+        self.draw_index.add("flag", self.flag_actor)
+
+    def stream(self):
+        """Carrega e descarrega chunks conforme a câmera."""
+        floor = self.level.uid_floor(self.camera_x)
+        if floor > self.uid_floor:
+            self.forget_below(floor)
+        streamer = self.streamer
+        loads, unloads = streamer.update(self.camera_x)
+        for first, last in unloads:
+            self.unload_chunks(first, last)
+        for span in loads:
+            self.load_span(*streamer.bounds(span))
+        self.enemy_engine.set_windows(streamer.bounds(streamer.active),
+                                      streamer.bounds(streamer.loaded))
+        self.enemy_engine.unload_outside()
+
+    def forget_below(self, floor):
+        """
+        Dá por coletadas as moedas e por derrotados os inimigos com uid <
+        floor, de seções que a fase infinita já descartou, e tira esses uids
+        dos conjuntos: assim eles não crescem com a distância percorrida.
+        Voltando até lá, as seções refeitas vêm sem moedas nem inimigos.
+        """
+        self.uid_floor = floor
+        self.collected = {uid for uid in self.collected if uid >= floor}
+        self.enemy_engine.forget_below(floor)
+
+    def load_span(self, lo, hi):
+        """Instancia blocos, espinhos, moedas e inimigos com x em [lo, hi)."""
+        level = self.level
+        images = level.images
+        add = self.add_static
+
+        rows = level.rows_in("blocks", lo, hi)
+        for uid, image_id, x, y in zip(rows["uid"].tolist(), rows["image"].tolist(),
+                                       rows["x"].tolist(), rows["y"].tolist()):
+            block = Entity(images[image_id], (x, y))
+            self.level_blocks.append(block)
+            add("blocks", block, uid)
+
+        rows = level.rows_in("spikes", lo, hi)
+        spikes = self.enemies["spikes"]
+        for uid, x, y in zip(rows["uid"].tolist(), rows["x"].tolist(), rows["y"].tolist()):
+            spike = Entity("enemy_spike", (x, y))
+            spikes.append(spike)
+            add("spikes", spike, uid)
+
+        # Moedas já coletadas nesta partida não voltam ao recarregar o chunk.
+        # O quadro delas vem do relógio "coins", não de coin.image.
+        rows = level.rows_in("coins", lo, hi)
+        floor = self.uid_floor
+        for uid, x, y in zip(rows["uid"].tolist(), rows["x"].tolist(), rows["y"].tolist()):
+            if uid >= floor and uid not in self.collected:
+                self.add_coin(uid, x, y)
+
+        self.enemy_engine.spawn(level, lo, hi)
+
+    def add_static(self, kind, entity, uid):
+        """Registra uma entidade da fase no broadphase e no chunk dela."""
+        self.register(entity, kind, entity, uid)
+        self.chunk_entities.setdefault(self.streamer.chunk_of(entity.x), []).append((kind, entity))
+
+    def add_coin(self, uid, x, y):
+        coin = Entity(coin_frames[0], (x, y))
+        self.coins.append(coin)
+        self.coin_uids[id(coin)] = uid
+        self.add_static("coins", coin, uid)
+
+    def unload_chunks(self, first, last):
+        """Solta as entidades estáticas dos chunks [first, last]."""
+        gone = set()
+        for idx in range(first, last + 1):
+            for kind, entity in self.chunk_entities.pop(idx, ()):
+                self.unregister(entity, kind, entity)
+                self.coin_uids.pop(id(entity), None)
+                gone.add(id(entity))
+        if gone:
+            self.level_blocks[:] = [e for e in self.level_blocks if id(e) not in gone]
+            spikes = self.enemies["spikes"]
+            spikes[:] = [e for e in spikes if id(e) not in gone]
+            self.coins[:] = [e for e in self.coins if id(e) not in gone]
+
+    def register(self, item, kind, box, order=None):
+        """Coloca item no broadphase e, se o tipo é desenhado pelo índice, na lista dele."""
+        self.grid.insert(item, kind, box, order)
+        if kind in DRAW_KINDS:
+            self.draw_index.add(kind, box)
+
+    def unregister(self, item, kind, box):
+        self.grid.remove(item)
+        if kind in DRAW_KINDS:
+            self.draw_index.remove(kind, box)
+
+    # --- Lógica do Jogo ---
+    def jump(self):
+        player = self.player
+        if player.jumps_left > 0:
+            player.vy = -JUMP_POWER
+            player.jumps_left -= 1
+            self.events.append("jump")
+            self.telemetry.record(JUMP, self.tick, player.x, player.y, player.vy)
+
+    def step(self, inputs=NO_INPUT):
+        """Avança um tick e devolve os eventos (sons) gerados nele."""
+        events = self.events = []
+        if self.state != "playing":
+            return events
+        player = self.player
+        dt = self.dt
+        lap = self.profiler.lap
+        self.tick += 1
+        self.remember()
+
+        for _ in range(inputs.jump):
+            self.jump()
+
+        # O broadphase vem antes do movimento: a caixa cobre o caminho que o
+        # player faria sem colidir em nada no tick inteiro (os blocos só o
+        # param no meio dele, e a folga cobre o resto)
+        margin = BROADPHASE_MARGIN * max(dt, 1)
+        left = player.left
+        top = player.top
+        dx = PLAYER_SPEED * dt * ((1 if inputs.right else 0) - (1 if inputs.left else 0))
+        vy = player.vy
+        dy = [0.0, dt * vy + GRAVITY * dt * (dt + 1) * 0.5]
+        apex = -vy / GRAVITY - 0.5
+        if 0 < apex < dt:
+            dy.append(apex * vy + GRAVITY * apex * (apex + 1) * 0.5)
+        box = (left + min(dx, 0) - margin, top + min(dy) - margin,
+               left + max(dx, 0) + player.width + margin,
+               top + max(dy) + player.height + margin)
+        self.candidates = self.grid.query(*box)
+        self.enemy_candidates = self.enemy_engine.near(*box)
+        lap("input")
+
+        # Movimento do personagem, em passos de um tick de BASE_HZ (o último
+        # pode ser fracionário): pousar num bloco de 18 px é decidido nos
+        # mesmos instantes a qualquer SIM_HZ, e o que resta do tick depois do
+        # pouso já corre em cima dele
+        moving = bool(inputs.left or inputs.right)
+        top_y = ground_top_y()
+        for part in self.substeps:
+            start_bottom = player.bottom
+            if inputs.left:
+                player.x -= PLAYER_SPEED * part
+            if inputs.right:
+                player.x += PLAYER_SPEED * part
+
+            # Os ticks de BASE_HZ do Euler semi-implícito (vy += g; y += vy)
+            # somados de forma fechada; a soma se divide sem erro entre os
+            # passos, e com dt = 1 a conta dá os mesmos bits de antes
+            vy = player.vy
+            player.y += part * vy + GRAVITY * part * (part + 1) * 0.5
+            player.vy = vy + GRAVITY * part
+
+            if player.bottom >= top_y:
+                player.bottom = top_y
+                player.vy = 0
+                player.on_ground = True
+                player.jumps_left = 2
+            self.land_on_blocks(start_bottom)
+        lap("gravity")
+
+        self.check_collisions()
+        lap("check_collisions")
+        self.update_all_enemies()
+        lap("update_all_enemies")
+        self.animate_coins()
+        lap("animate_coins")
+
+        clock = self.clocks["player"]
+        clock.advance(dt)
+        if player.on_ground:
+            frames = player_frames["run"] if moving else player_frames["idle"]
+            player.image = frames[clock.frame % len(frames)]
+        else:
+            player.image = player_frames["jump"][0]
+
+        self.camera_x = max(0, player.x - WIDTH * 0.4)
+
+        if self.hit_any_lethal_enemy():
+            self.state = "game_over"
+            events.append("game_over")
+
+        if player.x >= self.level.length and self.state == "playing":
+            self.all_coins_collected = (self.score == self.level.total_coins)
+            self.state = "complete"
+            events.append("victory")
+        lap("hit_any_lethal_enemy")
+
+        self.stream()
+        self.reach_checkpoint()
+        lap("stream")
+        return events
+
+    def reach_checkpoint(self):
+        """Guarda um Snapshot quando o player pisa no chão depois do próximo checkpoint."""
+        checkpoints = self.level.checkpoints
+        i = self.next_checkpoint
+        player = self.player
+        if (i < len(checkpoints) and player.x >= checkpoints[i] and player.on_ground
+                and self.state == "playing"):
+            while i < len(checkpoints) and player.x >= checkpoints[i]:
+                i += 1
+            self.next_checkpoint = i
+            self.checkpoint = self.snapshot()
+
+    def path(self):
+        """(left, top) do player no início do tick e o quanto ele andou desde então."""
+        player = self.player
+        prev_x, prev_y = self.prev_player
+        left = prev_x - player.width * 0.5
+        top = prev_y - player.height * 0.5
+        return left, top, player.left - left, player.top - top
+
+    def check_collisions(self):
+        """
+        Verifica colisões com inimigos e moedas (os blocos já foram resolvidos
+        durante o movimento, em land_on_blocks()).
+        Só olha os candidatos do broadphase, já em ordem de inserção.
+        O que o teste de sobreposição do fim do tick não pega (o player
+        atravessou algo no meio do caminho) é resolvido por colisão contínua.
+        """
+        player = self.player
+        candidates = self.candidates
+        removed = False
+        start_left, start_top, dx, dy = self.path()
+        width = player.width
+        height = player.height
+        swept = abs(dx) > SWEEP_MIN or abs(dy) > SWEEP_MIN
+        for kind, group, indices in self.enemy_candidates:
+            for i in indices:
+                if not group.alive[i]:
+                    continue
+                if self._touches(group, i):
+                    enemy_y = group.top[i] + group.hh
+                    stomp = player.vy > 0 and player.bottom <= enemy_y + 10
+                elif swept and player.vy > 0 and dy > 0:
+                    # Passou pelo inimigo no meio do tick: vale se caiu em cima dele
+                    hit = sweep(start_left, start_top, width, height, dx, dy,
+                                float(group.left[i]), float(group.top[i]), group.width, group.height)
+                    stomp = hit is not None and hit[1] == 1
+                else:
+                    stomp = False
+                if stomp:
+                    self.telemetry.record(STOMP, self.tick, player.x, player.y, player.vy,
+                                          SUBJECT_IDS[kind], group.uid[i])
+                    group.kill(i)
+                    player.vy = -JUMP_POWER * 0.7
+                    self.events.append("squish")
+
+        for kind, coin in candidates:
+            if kind == "coins" and (player.colliderect(coin) or swept and sweep(
+                    start_left, start_top, width, height, dx, dy,
+                    coin.left, coin.top, coin.width, coin.height)):
+                self.coins.remove(coin)
+                self.unregister(coin, "coins", coin)
+                uid = self.coin_uids.pop(id(coin))
+                self.collected.add(uid)
+                self.telemetry.record(COIN, self.tick, player.x, player.y, player.vy, 0, uid)
+                removed = True
+                self.score += 1
+                self.events.append("coin_sound")
+
+        if removed:
+            entries = self.grid.entries
+            self.candidates = [c for c in candidates if id(c[1]) in entries]
+
+    def land(self, block):
+        player = self.player
+        player.bottom = block.top
+        player.vy = 0
+        player.on_ground = True
+        player.jumps_left = 2
+
+    def land_on_blocks(self, start_bottom):
+        """
+        Pousa o player num bloco ou bate a cabeça nele, depois de um passo do
+        movimento; start_bottom é o bottom do player no começo desse passo.
+        """
+        player = self.player
+        for kind, block in self.candidates:
+            if kind != "blocks":
+                continue
+            hit = player.colliderect(block)
+            if hit and player.vy >= 0 and player.bottom <= block.y + 10:
+                self.land(block)
+            elif hit and player.vy < 0 and player.top >= block.bottom - 10:
+                player.top = block.bottom
+                player.vy = 0
+            elif (player.vy >= 0 and start_bottom <= block.top < player.bottom and
+                  player.left < block.right and player.right > block.left):
+                # Caiu rápido demais para a tolerância de 10 px: o pé cruzou o
+                # topo do bloco no meio do passo (o x já é o do fim, porque o
+                # World move x antes de y). Subindo, o bloco continua vazado.
+                self.land(block)
+
+    def _touches(self, group, i):
+        """colliderect do player com o inimigo i do grupo."""
+        player = self.player
+        left = group.left[i]
+        top = group.top[i]
+        return (player.left < left + group.width and
+                player.top < top + group.height and
+                player.left + player.width > left and
+                player.top + player.height > top)
+
+    def update_all_enemies(self):
+        # Atualiza os inimigos
+        dt = self.dt
+        self.enemy_engine.update(dt)
+        clocks = self.clocks
+        animated = self.animated
+        for kind in ENEMY_KINDS:
+            if animated is None or kind in animated:
+                clocks[kind].advance(dt)
+
+        # Animação da bandeira
+        if animated is None or "flag" in animated:
+            clock = clocks["flag"]
+            clock.advance(dt)
+            self.flag_actor.image = flag_frames[clock.frame]
+
+    def hit_any_lethal_enemy(self):
+        """
+        Verifica se o player morreu.
+        Espinhos matam sempre. Inimigos matam se não for 'stomp' (pulo na cabeça).
+        """
+        player = self.player
+        record = self.telemetry.record
+        start_left, start_top, dx, dy = self.path()
+        width = player.width
+        height = player.height
+        swept = abs(dx) > SWEEP_MIN or abs(dy) > SWEEP_MIN
+        for kind, spike in self.candidates:
+            if kind == "spikes" and (player.colliderect(spike) or swept and sweep(
+                    start_left, start_top, width, height, dx, dy,
+                    spike.left, spike.top, spike.width, spike.height)):
+                # A ordem do spike no broadphase é o uid dele na fase
+                record(DEATH, self.tick, player.x, player.y, player.vy,
+                       SUBJECT_IDS[kind], self.grid.entries[id(spike)][0])
+                return True
+
+        for kind, group, indices in self.enemy_candidates:
+            for i in indices:
+                if not group.alive[i]:
+                    continue
+                if self._touches(group, i):
+                    enemy_y = group.top[i] + group.hh
+                    lethal = not (player.vy > 0 and player.bottom <= enemy_y + 10)
+                else:
+                    # O inimigo também andou no tick: o caminho é o relativo, e
+                    # um inimigo rápido atravessa até um player parado
+                    prev_left = float(group.prev_left[i])
+                    prev_top = float(group.prev_top[i])
+                    rel_dx = dx - (float(group.left[i]) - prev_left)
+                    rel_dy = dy - (float(group.top[i]) - prev_top)
+                    if swept or abs(rel_dx) > SWEEP_MIN or abs(rel_dy) > SWEEP_MIN:
+                        hit = sweep(start_left, start_top, width, height, rel_dx, rel_dy,
+                                    prev_left, prev_top, group.width, group.height)
+                        # Encostar por cima, caindo, é um stomp, não uma morte
+                        lethal = hit is not None and not (hit[1] == 1 and player.vy > 0 and rel_dy > 0)
+                    else:
+                        lethal = False
+                if lethal:
+                    record(DEATH, self.tick, player.x, player.y, player.vy,
+                           SUBJECT_IDS[kind], group.uid[i])
+                    return True
+
+        return False
+
+    def animate_coins(self):
+        # Todas as moedas giram juntas: basta avançar o relógio delas
+        if self.animated is None or "coins" in self.animated:
+            self.clocks["coins"].advance(self.dt)
+
+    def frame(self, kind):
+        """Nome do quadro atual da animação compartilhada de kind."""
+        return self.animation_frames[kind][self.clocks[kind].frame]